@@ -76,6 +76,14 @@ def save_srt(transcription, srt_path):
         f.write(formatted_srt)
     
     print(f"💾 字幕已儲存: {srt_path}")
+    
+    # 詞級時間軸附檔，find_timecodes 會優先使用
+    if transcription.get('words'):
+        from modules.word_timeline import WordTimeline
+        
+        timeline_path = Path(srt_path).with_suffix('.words.npz')
+        WordTimeline.from_dict(transcription['words']).save(timeline_path)
+        print(f"💾 詞級時間軸已儲存: {timeline_path}")
 
 def process_video(video_path, slicer, output_root):
     """處理單一影片"""
@@ -15,6 +15,9 @@ from typing import List, Dict, Optional
 # Add project root to path
 sys.path.append(str(Path(__file__).parents[4]))
 
+# STT 工具（詞級時間軸）
+STT_TOOL_PATH = Path(__file__).parents[4] / "01-system/tools/stt/audio_transcribe"
+
 class VideoSlicer:
     def __init__(self, config_path: str = None, api_key: str = None):
         self.base_dir = Path(__file__).parent
@@ -360,30 +363,26 @@ class VideoSlicer:
         text = text.lower()
         return "".join(text.split())
 
-    def find_timecodes(self, srt_path, clips):
-        """在 SRT 中尋找對應的時間碼"""
+    def _timeline_path(self, srt_path):
+        """字幕旁的詞級時間軸（<名稱>.words.npz；格式化字幕共用原始字幕的時間軸）"""
+        srt_path = Path(srt_path)
+        names = [srt_path.stem]
+        if srt_path.stem.endswith("_formatted"):
+            names.append(srt_path.stem[:-len("_formatted")])
+        
+        for name in names:
+            path = srt_path.with_name(f"{name}.words.npz")
+            if path.exists():
+                return path
+        return None
+
+    def _srt_index(self, srt_path, cc):
+        """解析 SRT，回傳 (正規化全文, 每條字幕的時間與全文位置)"""
         import re
-        from datetime import datetime, timedelta
         
-        def parse_time(t_str):
-            t_str = t_str.replace(',', '.')
-            return datetime.strptime(t_str, "%H:%M:%S.%f")
-            
-        def format_time(dt):
-            # 格式化回 ffmpeg 可用的字串 (HH:MM:SS.mmm)
-            return dt.strftime("%H:%M:%S.%f")[:-3]
-
-        def time_diff_sec(t1_str, t2_str):
-            t1 = parse_time(t1_str)
-            t2 = parse_time(t2_str)
-            return (t2 - t1).total_seconds()
-
         with open(srt_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        import opencc
-        cc = opencc.OpenCC('s2t')
-        
         blocks = re.split(r'\n\n', content.strip())
         srt_data = []
         full_text_normalized = ""
@@ -414,6 +413,128 @@ class VideoSlicer:
                     'global_start_idx': start_idx,
                     'global_end_idx': end_idx
                 })
+        
+        return full_text_normalized, srt_data
+
+    def _timeline_index(self, timeline_path, cc):
+        """由詞級時間軸建立與 _srt_index 相同格式的索引（時間精準到詞）"""
+        if str(STT_TOOL_PATH) not in sys.path:
+            sys.path.append(str(STT_TOOL_PATH))
+        from modules.word_timeline import WordTimeline
+        
+        def format_seconds(seconds):
+            millis = int(round(seconds * 1000))
+            hours, millis = divmod(millis, 3600000)
+            minutes, millis = divmod(millis, 60000)
+            secs, millis = divmod(millis, 1000)
+            return f"{hours:02}:{minutes:02}:{secs:02}.{millis:03}"
+        
+        timeline = WordTimeline.load(timeline_path)
+        starts = timeline.starts.tolist()
+        ends = timeline.ends.tolist()
+        
+        srt_data = []
+        parts = []
+        position = 0
+        for i in range(len(timeline)):
+            text = cc.convert(timeline.word(i))
+            norm_text = self._normalize_text(text)
+            parts.append(norm_text)
+            srt_data.append({
+                'start': format_seconds(starts[i]),
+                'end': format_seconds(ends[i]),
+                'text': text,
+                'norm_text': norm_text,
+                'global_start_idx': position,
+                'global_end_idx': position + len(norm_text)
+            })
+            position += len(norm_text)
+        
+        return "".join(parts), srt_data
+
+    def _match_clip(self, index, clip):
+        """
+        在索引中尋找片段的開始與結束語句（依正規化文字位置二分搜尋對應的字幕 / 詞）
+        回傳 (開始時間, 結束時間, None)；找不到時回傳 (None, None, 錯誤訊息)
+        """
+        import bisect
+        
+        full_text_normalized, srt_data, start_indices, end_indices = index
+        start_norm = self._normalize_text(clip['start_text'])
+        end_norm = self._normalize_text(clip['end_text'])
+        
+        start_pos = full_text_normalized.find(start_norm)
+        if start_pos == -1:
+            start_pos = full_text_normalized.find(start_norm[:30])
+        
+        if start_pos == -1:
+            return None, None, f"找不到開始語句: {clip['start_text'][:20]}..."
+            
+        end_pos = full_text_normalized.find(end_norm, start_pos)
+        if end_pos == -1:
+            end_pos = full_text_normalized.find(end_norm[-30:], start_pos)
+            
+        if end_pos == -1:
+            return None, None, f"找不到結束語句: {clip['end_text'][-20:]}..."
+
+        start_time_str = None
+        end_time_str = None
+        
+        first = bisect.bisect_right(end_indices, start_pos)
+        if first < len(srt_data):
+            start_time_str = srt_data[first]['start']
+        last = bisect.bisect_right(start_indices, end_pos + len(end_norm)) - 1
+        if last >= 0:
+            end_time_str = srt_data[last]['end']
+        
+        if not (start_time_str and end_time_str):
+            return None, None, "時間碼對應失敗"
+        return start_time_str, end_time_str, None
+
+    def find_timecodes(self, srt_path, clips):
+        """
+        在 SRT 中尋找對應的時間碼（有詞級時間軸附檔時優先使用）
+        詞級時間軸是未經格式化的原始文字，語句跨過被移除的贅詞或字典修正的詞時比對不到，改用字幕比對
+        """
+        from datetime import datetime, timedelta
+        
+        def parse_time(t_str):
+            t_str = t_str.replace(',', '.')
+            return datetime.strptime(t_str, "%H:%M:%S.%f")
+            
+        def format_time(dt):
+            # 格式化回 ffmpeg 可用的字串 (HH:MM:SS.mmm)
+            return dt.strftime("%H:%M:%S.%f")[:-3]
+
+        def time_diff_sec(t1_str, t2_str):
+            t1 = parse_time(t1_str)
+            t2 = parse_time(t2_str)
+            return (t2 - t1).total_seconds()
+
+        import opencc
+        cc = opencc.OpenCC('s2t')
+        
+        timeline_path = self._timeline_path(srt_path)
+        sources = ['words', 'srt'] if timeline_path else ['srt']
+        if timeline_path:
+            print(f"⏱️  使用詞級時間軸: {timeline_path.name}")
+        
+        indexes = {}
+        
+        def index(source):
+            """需要時才建立索引（字幕索引只在詞級時間軸比對不到時建立）"""
+            if source not in indexes:
+                if source == 'words':
+                    full_text_normalized, srt_data = self._timeline_index(timeline_path, cc)
+                else:
+                    full_text_normalized, srt_data = self._srt_index(srt_path, cc)
+                indexes[source] = (
+                    full_text_normalized,
+                    srt_data,
+                    [item['global_start_idx'] for item in srt_data],
+                    [item['global_end_idx'] for item in srt_data]
+                )
+            return indexes[source]
 
         results = []
         padding = self.config['clips'].get('padding', 0)
@@ -422,68 +543,48 @@ class VideoSlicer:
             topic_name = clip.get('topic_name', clip.get('topic', 'unknown'))
             print(f"🔍 尋找主題: {topic_name}")
             
-            start_norm = self._normalize_text(clip['start_text'])
-            end_norm = self._normalize_text(clip['end_text'])
-            
-            start_pos = full_text_normalized.find(start_norm)
-            if start_pos == -1:
-                start_pos = full_text_normalized.find(start_norm[:30])
+            for source in sources:
+                start_time_str, end_time_str, error = self._match_clip(index(source), clip)
+                if error is None:
+                    break
+                if source == 'words':
+                    print(f"   ↩️  詞級時間軸比對失敗（{error}），改用字幕比對")
             
-            if start_pos == -1:
-                print(f"   ⚠️  找不到開始語句: {clip['start_text'][:20]}...")
-                continue
-                
-            end_pos = full_text_normalized.find(end_norm, start_pos)
-            if end_pos == -1:
-                end_pos = full_text_normalized.find(end_norm[-30:], start_pos)
-                
-            if end_pos == -1:
-                print(f"   ⚠️  找不到結束語句: {clip['end_text'][-20:]}...")
+            if error:
+                print(f"   ⚠️  {error}")
                 continue
-
-            start_time_str = None
-            end_time_str = None
             
-            for item in srt_data:
-                if start_time_str is None and item['global_end_idx'] > start_pos:
-                    start_time_str = item['start']
-                if item['global_start_idx'] <= end_pos + len(end_norm):
-                    end_time_str = item['end']
+            # Apply Padding
+            t1 = parse_time(start_time_str)
+            t2 = parse_time(end_time_str)
             
-            if start_time_str and end_time_str:
-                # Apply Padding
-                t1 = parse_time(start_time_str)
-                t2 = parse_time(end_time_str)
-                
-                # Add padding
-                t1 = t1 - timedelta(seconds=padding)
-                t2 = t2 + timedelta(seconds=padding)
-                
-                # Ensure start is not negative (using arbitrary base date 1900-01-01)
-                if t1.year < 1900: 
-                    t1 = t1.replace(year=1900, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-                
-                duration = (t2 - t1).total_seconds()
-                
-                if duration < 5:
-                    print(f"   ⚠️  片段過短 ({duration}s)，忽略")
-                    continue
+            # Add padding
+            t1 = t1 - timedelta(seconds=padding)
+            t2 = t2 + timedelta(seconds=padding)
+            
+            # Ensure start is not negative (using arbitrary base date 1900-01-01)
+            if t1.year < 1900: 
+                t1 = t1.replace(year=1900, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+            
+            duration = (t2 - t1).total_seconds()
+            
+            if duration < 5:
+                print(f"   ⚠️  片段過短 ({duration}s)，忽略")
+                continue
+            
+            final_start = format_time(t1)
+            final_end = format_time(t2)
                 
-                final_start = format_time(t1)
-                final_end = format_time(t2)
-                    
-                results.append({
-                    'start': final_start,
-                    'end': final_end,
-                    'topic': clip.get('topic_name', clip.get('topic', 'unknown')),
-                    'content_summary': clip.get('content_summary', ''),
-                    'key_point': clip.get('key_point', ''),
-                    'why_selected': clip.get('why_selected', clip.get('reason', '')),
-                    'estimated_duration': clip.get('estimated_duration', duration)
-                })
-                print(f"   ✅ 鎖定時間: {final_start} - {final_end} ({duration:.1f}s, padding={padding}s)")
-            else:
-                print(f"   ⚠️  時間碼對應失敗")
+            results.append({
+                'start': final_start,
+                'end': final_end,
+                'topic': clip.get('topic_name', clip.get('topic', 'unknown')),
+                'content_summary': clip.get('content_summary', ''),
+                'key_point': clip.get('key_point', ''),
+                'why_selected': clip.get('why_selected', clip.get('reason', '')),
+                'estimated_duration': clip.get('estimated_duration', duration)
+            })
+            print(f"   ✅ 鎖定時間: {final_start} - {final_end} ({duration:.1f}s, padding={padding}s)")
                 
         return results
 
@@ -0,0 +1,314 @@
+"""
+Async STT Engine Module - STTEngine 的 asyncio 版本
+"""
+import asyncio
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from .audio_splitter import read_segment_list
+from .client_pool import ClientPool
+from .compressor import CompressedAudio
+from .polling import is_not_ready, is_unsupported_submission
+from .probe_cache import media_summary, probe_command
+from .rate_limiter import is_rate_limited
+from .segment_timeline import SegmentTimeline
+from .stt_engine import STTEngine
+
+
+class AsyncSTTEngine:
+    """
+    以單一事件迴圈同時驅動多個檔案與片段的轉錄
+    設定、Key 池、額度帳本、速率限制、壓縮規劃與結果快取都沿用 STTEngine
+    不套用上傳前剪除靜音與加速（silence_removal / tempo），結果快取 key 也不含這兩項設定
+    """
+
+    def __init__(self, config_path="config.yaml", max_requests=None, max_ffmpeg=None):
+        self.engine = STTEngine(config_path)
+        self.config = self.engine.config
+
+        per_key = self.config['engines']['groq'].get('max_workers', 4)
+        key_count = max(1, sum(len(keys) for keys in self.engine.api_keys.values()))
+        self._requests = asyncio.Semaphore(max_requests or per_key * key_count)
+        self._ffmpeg = asyncio.Semaphore(max_ffmpeg or os.cpu_count() or 4)
+        self.clients = ClientPool(asynchronous=True)
+
+        engine = self.engine
+        if engine._silence_config() or any(engine._tempo(name) != 1.0 for name in ('groq', 'elevenlabs')):
+            print("⚠️  非同步引擎不套用 silence_removal / tempo 設定，以原始音檔轉錄")
+
+    async def _run(self, cmd, capture=True):
+        """以 asyncio 子程序執行 ffmpeg / ffprobe，回傳 stdout"""
+        async with self._ffmpeg:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            stdout, _ = await process.communicate()
+
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
+        return stdout
+
+    async def _get_duration(self, file_path):
+        """取得音檔長度（與 STTEngine 共用媒體資訊快取）"""
+        probe_cache = self.engine.probe_cache
+        entry = probe_cache.lookup(file_path)
+        if entry is None:
+            stdout = await self._run(probe_command(file_path))
+            entry = probe_cache.store(file_path, json.loads(stdout))
+        return media_summary(entry)['duration']
+
+    async def _call_with_key(self, engine, minutes, func):
+        """STTEngine._call_with_key 的非同步版本"""
+        key_pool = self.engine.key_pool
+        api_keys = self.engine.api_keys[engine]
+        tried = set()
+        last_error = None
+
+        while True:
+            api_key = await key_pool.acquire_async(engine, minutes, exclude=tried)
+            if api_key is None:
+                break
+
+            try:
+                result = await func(api_key)
+            except Exception as e:
+                key_pool.release(engine, api_key, minutes, used=False)
+                tried.add(api_key)
+                last_error = e
+                print(f"⚠️  {engine} Key #{api_keys.index(api_key) + 1} 失敗: {str(e)}")
+                continue
+
+            await asyncio.to_thread(key_pool.release, engine, api_key, minutes)
+            return result
+
+        if last_error:
+            raise last_error
+        raise RuntimeError(f"所有 {engine} API Keys 的額度都已用盡")
+
+    async def _groq_request(self, api_key, name, file):
+        """送出一次 Groq 轉錄請求（串流上傳 file；速率限制與 429 處理同 STTEngine）"""
+        client = self.clients.get('groq', api_key)
+        rate_limiter = self.engine.rate_limiter
+        max_retries = max(1, self.config['engines']['groq'].get('max_retries', 10))  # 至少送出一次
+
+        for attempt in range(max_retries):
+            await rate_limiter.wait_async('groq', api_key)
+            file.seek(0)
+            try:
+                async with self._requests:
+                    raw = await client.audio.transcriptions.with_raw_response.create(
+                        file=(name, file), **self.engine._groq_params()
+                    )
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == max_retries - 1:
+                    raise
+                wait = rate_limiter.on_rate_limited('groq', api_key, e, attempt)
+                print(f"速率限制，此 Key 暫停 {wait:.0f} 秒後重試（{attempt + 1}/{max_retries}）...")
+                continue
+
+            rate_limiter.update_from_headers('groq', api_key, raw.headers)
+            return raw.parse()
+
+    async def transcribe_groq(self, audio_path, job_key=None):
+        """使用 Groq Whisper 轉錄（大檔案以並行片段處理，支援片段續傳）"""
+        engine = self.engine
+        duration = await self._get_duration(audio_path)
+        single = duration <= engine._max_single_seconds()
+
+        # 輸入已符合上傳條件時直接上傳原始檔，不經 ffmpeg
+        source = await asyncio.to_thread(engine._passthrough_plan, audio_path, duration)
+        if single and source and source.fits:
+            name = f"{Path(audio_path).stem}{source.ext}"
+
+            async def upload(api_key):
+                with open(audio_path, "rb") as f:
+                    transcription = await self._groq_request(api_key, name, f)
+                return engine._groq_result(transcription)
+
+            result = await self._call_with_key('groq', duration / 60, upload)
+            result['compression'] = engine._compression_report(source, source.size)
+            return result
+
+        plan = engine.compression_planner.plan(duration)
+
+        # 可直傳的來源放不進單次上傳時直接以 -c copy 分割，不重新壓縮
+        if single and plan.fits and not source:
+            data = await self._run(
+                ["ffmpeg", "-v", "error", "-i", str(audio_path)]
+                + plan.encode_args()
+                + ["-f", plan.format, "pipe:1"]
+            )
+            if len(data) <= engine.compression_planner.target_bytes:
+                name = f"{Path(audio_path).stem}{plan.ext}"
+
+                async def create(api_key):
+                    transcription = await self._groq_request(api_key, name, io.BytesIO(data))
+                    return engine._groq_result(transcription)
+
+                result = await self._call_with_key('groq', duration / 60, create)
+                result['compression'] = engine._compression_report(plan, len(data))
+                return result
+
+        if job_key is None:
+            job_key = await asyncio.to_thread(engine._cache_key, audio_path, 'groq', False)
+        return await self._transcribe_groq_chunked(audio_path, duration, job_key)
+
+    async def _transcribe_groq_chunked(self, audio_path, duration, job_key):
+        """一次 ffmpeg 完成壓縮與分割後，所有未完成的片段同時送出"""
+        engine = self.engine
+        journal = engine._open_journal(job_key)
+        plan = await asyncio.to_thread(engine._split_source_plan, audio_path, duration)
+        # 靜音分析以 numpy 計算，放到執行緒避免阻塞事件迴圈
+        split_times = await asyncio.to_thread(engine._plan_silence_splits, audio_path)
+
+        tmp_dir = tempfile.mkdtemp(prefix="stt_chunks_")
+        try:
+            cmd, list_path = engine._split_command(audio_path, plan, split_times, tmp_dir)
+            await self._run(cmd, capture=False)
+            chunks = read_segment_list(list_path)
+            actual_size = sum(os.path.getsize(chunk) for chunk, _, _ in chunks)
+
+            async def transcribe_chunk(index, chunk, start, end):
+                done = journal.get(index, start, end) if journal is not None else None
+                if done is not None:
+                    return done
+
+                minutes = (end - start) / 60
+                try:
+                    with open(chunk, "rb") as f:
+                        transcription = await self._call_with_key(
+                            'groq', minutes,
+                            lambda api_key: self._groq_request(api_key, os.path.basename(chunk), f)
+                        )
+                    result = engine._groq_result(transcription)
+                except Exception as e:
+                    if not engine._failover_engine():
+                        raise
+                    print(f"⚠️  片段 {index + 1} Groq 失敗（{e}），改用 {engine._failover_engine()}")
+                    response = await self._call_with_key(
+                        'elevenlabs', minutes, lambda api_key: self._elevenlabs_convert(api_key, chunk)
+                    )
+                    converted = engine._elevenlabs_result(response)
+                    result = {'text': converted['text'], 'segments': converted['segments']}
+                if journal is not None:
+                    journal.record(index, start, end, result)
+                return result
+
+            # 某個片段失敗時其餘片段照常完成並寫入續傳紀錄，全部結束後才拋出錯誤、刪除暫存目錄
+            tasks = [asyncio.ensure_future(transcribe_chunk(i, *chunk)) for i, chunk in enumerate(chunks)]
+            try:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            except asyncio.CancelledError:
+                # 整個工作被取消：先停下所有片段，避免刪除暫存目錄後仍在讀取片段檔
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                raise errors[0]
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        result = engine._merge_chunks(results, [start for _, start, _ in chunks])
+        result['compression'] = engine._compression_report(plan, actual_size)
+        if journal is not None:
+            journal.remove()
+        return result
+
+    async def _elevenlabs_convert(self, api_key, audio):
+        """
+        送出一次 ElevenLabs 轉錄請求（audio 為檔案路徑或 CompressedAudio）
+        非同步模式下只有上傳佔用請求名額，輪詢期間不佔用，可同時等待大量工作
+        """
+        engine = self.engine
+        client = self.clients.get('elevenlabs', api_key)
+        if not isinstance(audio, CompressedAudio):
+            audio = CompressedAudio(Path(audio).name, path=str(audio), owned=False)
+
+        await engine.rate_limiter.wait_async('elevenlabs', api_key)
+        transcription_id = None
+        async with self._requests:
+            with audio.open() as f:
+                if engine._elevenlabs_async():
+                    try:
+                        submitted = await client.speech_to_text.convert(
+                            file=(audio.name, f), webhook=True, **engine._elevenlabs_params()
+                        )
+                        transcription_id = submitted.transcription_id
+                    except Exception as e:
+                        if not is_unsupported_submission(e):
+                            raise
+                        engine._disable_elevenlabs_async(e)
+                        f.seek(0)
+                if transcription_id is None:
+                    return await client.speech_to_text.convert(
+                        file=(audio.name, f), **engine._elevenlabs_params()
+                    )
+
+        for delay in engine._elevenlabs_poll_delays():
+            await asyncio.sleep(delay)
+            try:
+                return await client.speech_to_text.transcripts.get(transcription_id=transcription_id)
+            except Exception as e:
+                if not is_not_ready(e):
+                    raise
+        raise TimeoutError(f"ElevenLabs 工作 {transcription_id} 逾時仍未完成")
+
+    async def transcribe_elevenlabs(self, audio_path):
+        """使用 ElevenLabs Scribe 轉錄（上傳前依壓縮規劃壓縮）"""
+        engine = self.engine
+        duration = await self._get_duration(audio_path)
+        audio = await asyncio.to_thread(engine._elevenlabs_upload, audio_path, duration)
+
+        try:
+            response = await self._call_with_key(
+                'elevenlabs', duration / 60, lambda api_key: self._elevenlabs_convert(api_key, audio)
+            )
+        finally:
+            audio.cleanup()
+        return engine._elevenlabs_result(response)
+
+    async def transcribe(self, audio_path, engine, use_cache=True):
+        """統一的非同步轉錄介面（先查結果快取）"""
+        if engine not in ("elevenlabs", "groq"):
+            raise ValueError(f"未知的引擎: {engine}")
+
+        result_cache = self.engine.result_cache
+        cache_key = None
+        use_cache = use_cache and result_cache is not None
+        if use_cache:
+            cache_key = await asyncio.to_thread(self.engine._cache_key, audio_path, engine, False)
+            cached = await asyncio.to_thread(result_cache.get, cache_key)
+            if cached is not None:
+                print(f"⚡ 命中轉錄快取：{Path(audio_path).name}")
+                cached['segments'] = SegmentTimeline.from_segments(cached['segments'])
+                return cached
+
+        if engine == "elevenlabs":
+            result = await self.transcribe_elevenlabs(audio_path)
+        else:
+            result = await self.transcribe_groq(audio_path, job_key=cache_key)
+            if self.engine._repair_config():
+                result = await asyncio.to_thread(self.engine.repair, audio_path, result)
+
+        if use_cache:
+            await asyncio.to_thread(result_cache.put, cache_key, result)
+        return result
+
+    async def transcribe_many(self, audio_paths, engine, use_cache=True):
+        """
+        同時轉錄多個檔案，回傳與輸入順序相同的結果列表
+        個別檔案失敗時該位置為例外物件，不影響其他檔案
+        """
+        return await asyncio.gather(
+            *(self.transcribe(path, engine, use_cache) for path in audio_paths),
+            return_exceptions=True
+        )
@@ -0,0 +1,100 @@
+"""
+Audio Splitter Module - 在靜音處規劃分割點、讀取片段清單
+"""
+import csv
+import subprocess
+from pathlib import Path
+
+
+def read_segment_list(list_path):
+    """
+    讀取 ffmpeg segment muxer 輸出的 CSV 片段清單
+    回傳 [(片段路徑, 開始秒數, 結束秒數), ...]
+    """
+    base_dir = Path(list_path).parent
+    chunks = []
+    with open(list_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 3:
+                continue
+            chunks.append((str(base_dir / Path(row[0]).name), float(row[1]), float(row[2])))
+    return chunks
+
+
+class SilenceSplitPlanner:
+    """解碼一次音檔，以 RMS 能量包絡找出低能量位置作為切點"""
+
+    def __init__(self, chunk_duration=300, search_window=30, frame_ms=50,
+                 min_silence_ms=300, sample_rate=16000):
+        self.chunk_duration = chunk_duration
+        self.search_window = search_window
+        self.frame_ms = frame_ms
+        self.min_silence_ms = min_silence_ms
+        self.sample_rate = sample_rate
+
+    def decode(self, input_path):
+        """以 ffmpeg 解碼為單聲道 16-bit PCM"""
+        import numpy as np
+
+        cmd = [
+            "ffmpeg", "-v", "error", "-i", str(input_path),
+            "-map", "0:a", "-ac", "1", "-ar", str(self.sample_rate),
+            "-f", "s16le", "pipe:1"
+        ]
+        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return np.frombuffer(result.stdout, dtype=np.int16)
+
+    def envelope(self, samples):
+        """計算 RMS 能量包絡（每 frame_ms 一個值），並以最短靜音長度平滑"""
+        import numpy as np
+
+        frame = int(self.sample_rate * self.frame_ms / 1000)
+        count = len(samples) // frame
+        if count == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        # 分塊計算，memmap 輸入時記憶體用量不隨音檔長度成長
+        rms = np.empty(count, dtype=np.float32)
+        block = max(1, self.sample_rate * 60 // frame)
+        for i in range(0, count, block):
+            j = min(count, i + block)
+            frames = samples[i * frame:j * frame].astype(np.float32).reshape(j - i, frame)
+            rms[i:j] = np.sqrt(np.mean(frames ** 2, axis=1))
+
+        # 平滑後才取最小值，避免切在字與字之間的短暫空隙
+        width = max(1, self.min_silence_ms // self.frame_ms)
+        if width > 1 and count >= width:
+            rms = np.convolve(rms, np.ones(width) / width, mode='same')
+        return rms
+
+    def plan(self, input_path):
+        """回傳切點（秒）列表"""
+        return self.plan_samples(self.decode(input_path))
+
+    def plan_samples(self, samples):
+        """由已解碼的樣本（陣列或 memmap）規劃切點"""
+        return self.plan_from_envelope(self.envelope(samples))
+
+    def plan_from_envelope(self, envelope):
+        """在每個目標切點前後 search_window 秒內，挑能量最低的位置"""
+        import numpy as np
+
+        frame_sec = self.frame_ms / 1000
+        total = len(envelope) * frame_sec
+        cuts = []
+        last = 0.0
+
+        # 剩餘長度在容許範圍內就不再切，避免產生過短的尾段
+        while total - last > self.chunk_duration + self.search_window:
+            target = last + self.chunk_duration
+            lo = max(target - self.search_window, last + self.chunk_duration / 2)
+            hi = min(target + self.search_window, total)
+
+            i_lo, i_hi = int(lo / frame_sec), int(hi / frame_sec)
+            idx = i_lo + int(np.argmin(envelope[i_lo:i_hi]))
+            cut = round((idx + 0.5) * frame_sec, 3)
+
+            cuts.append(cut)
+            last = cut
+
+        return cuts
@@ -0,0 +1,62 @@
+"""
+Chunk Journal Module - 記錄已完成的片段，讓中斷的長音檔轉錄可以續傳
+"""
+import json
+import threading
+from pathlib import Path
+
+from .segment_timeline import SegmentTimeline, json_default
+
+
+class ChunkJournal:
+    """
+    以 JSON Lines 記錄每個完成片段的轉錄結果（時間戳為片段內的相對時間）
+    檔名為工作 key（音檔內容雜湊 + 引擎參數），重跑時只需轉錄缺少的片段
+    """
+
+    def __init__(self, journal_dir, job_key):
+        self.path = Path(journal_dir) / f"{job_key}.jsonl"
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        entries = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 中斷時可能留下寫到一半的最後一行
+                    continue
+                entries[entry['index']] = entry
+        return entries
+
+    def get(self, index, start, end):
+        """取得已完成片段的結果；片段起訖時間不同（分割方式改變）時視為未完成"""
+        entry = self.entries.get(index)
+        if entry and abs(entry['start'] - start) < 0.01 and abs(entry['end'] - end) < 0.01:
+            return {'text': entry['text'], 'segments': SegmentTimeline.from_segments(entry['segments'])}
+        return None
+
+    def record(self, index, start, end, result):
+        """寫入一個完成的片段（立即 flush，確保當機後仍保留）"""
+        entry = {
+            'index': index,
+            'start': start,
+            'end': end,
+            'text': result['text'],
+            'segments': result['segments'],
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=json_default) + "\n")
+                f.flush()
+            self.entries[index] = entry
+
+    def remove(self):
+        """整個檔案完成後刪除紀錄"""
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,48 @@
+"""
+Client Pool Module - 每組 Key 共用一個 keep-alive 的 SDK client
+"""
+import threading
+
+
+class ClientPool:
+    """
+    依 (引擎, Key) 快取 SDK client，跨片段與檔案重複使用同一條 HTTP 連線
+    asynchronous=True 時建立 AsyncGroq / AsyncElevenLabs
+    """
+
+    def __init__(self, asynchronous=False):
+        self.asynchronous = asynchronous
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _create(self, engine, api_key):
+        if engine == 'groq':
+            if self.asynchronous:
+                from groq import AsyncGroq
+                return AsyncGroq(api_key=api_key)
+            from groq import Groq
+            return Groq(api_key=api_key)
+
+        if self.asynchronous:
+            from elevenlabs import AsyncElevenLabs
+            return AsyncElevenLabs(api_key=api_key)
+        from elevenlabs import ElevenLabs
+        return ElevenLabs(api_key=api_key)
+
+    def get(self, engine, api_key):
+        """取得這組 Key 的 client（第一次使用時建立）"""
+        slot = (engine, api_key)
+        with self._lock:
+            if slot not in self._clients:
+                self._clients[slot] = self._create(engine, api_key)
+            return self._clients[slot]
+
+    def close(self):
+        """關閉所有同步 client 的連線"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            close = getattr(client, 'close', None)
+            if close and not self.asynchronous:
+                close()
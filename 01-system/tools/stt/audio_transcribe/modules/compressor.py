@@ -0,0 +1,234 @@
+"""
+Compressor Module - 壓縮規劃，並以管線接收 ffmpeg 壓縮結果（不在來源目錄留下暫存檔）
+"""
+import io
+import os
+import subprocess
+import tempfile
+
+# 各編碼的 ffmpeg 參數；overhead 為容器額外負擔的估計倍率
+CODECS = {
+    'mp3': {'encoder': 'libmp3lame', 'format': 'mp3', 'ext': '.mp3', 'overhead': 1.01},
+    'opus': {'encoder': 'libopus', 'format': 'ogg', 'ext': '.ogg', 'overhead': 1.03},
+}
+
+# 可不重新編碼直接上傳（或以 -c copy 分割）的來源：ffprobe codec_name → (容器格式, 副檔名)
+PASSTHROUGH_CODECS = {
+    'mp3': ('mp3', '.mp3'),
+    'opus': ('ogg', '.ogg'),
+    'vorbis': ('ogg', '.ogg'),
+    'flac': ('flac', '.flac'),
+}
+
+
+def parse_bitrate(bitrate):
+    """將 '64k' 之類的位元率轉為 bps"""
+    bitrate = str(bitrate).lower()
+    if bitrate.endswith('k'):
+        return float(bitrate[:-1]) * 1000
+    return float(bitrate)
+
+
+class CompressionPlan:
+    """一次壓縮的編碼選擇與預估大小"""
+    passthrough = False
+
+    def __init__(self, profile, duration, predicted_size, fits):
+        self.codec = profile.get('codec', 'mp3')
+        self.sample_rate = profile['sample_rate']
+        self.channels = profile.get('channels', 1)
+        self.bitrate = profile['bitrate']
+        self.duration = duration
+        self.predicted_size = predicted_size
+        self.fits = fits
+
+    @property
+    def ext(self):
+        return CODECS[self.codec]['ext']
+
+    @property
+    def format(self):
+        return CODECS[self.codec]['format']
+
+    def encode_args(self):
+        """ffmpeg 音訊編碼參數（取第一個輸入的音訊）"""
+        return ["-map", "0:a"] + self.codec_args()
+
+    def codec_args(self):
+        """ffmpeg 編碼參數（不含 -map，供自訂濾鏡輸出使用）"""
+        args = [
+            "-c:a", CODECS[self.codec]['encoder'],
+            "-ac", str(self.channels), "-ar", str(self.sample_rate), "-b:a", str(self.bitrate)
+        ]
+        if self.codec == 'opus':
+            args += ["-application", "voip"]
+        return args
+
+    def describe(self):
+        return f"{self.codec} {self.sample_rate}Hz {self.bitrate}"
+
+
+class PassthroughPlan:
+    """
+    來源已是符合上傳條件的壓縮音訊：不重新編碼，直接上傳或以 -c copy 分割
+    介面與 CompressionPlan 相同，分割指令與壓縮報告不需區分
+    """
+    passthrough = True
+
+    def __init__(self, summary, duration, target_bytes):
+        self.codec = summary['audio_codec']
+        self.sample_rate = summary['sample_rate']
+        self.channels = summary['channels']
+        self.size = summary['size']
+        self.bits_per_second = self.size * 8 / duration if duration else 0
+        self.bitrate = f"{round(self.bits_per_second / 1000)}k"
+        self.duration = duration
+        self.predicted_size = self.size
+        self.fits = self.size <= target_bytes  # 與壓縮規劃相同，保留 multipart 等額外負擔的餘裕
+
+    @staticmethod
+    def accepts(summary, rules):
+        """ffprobe 摘要是否符合直傳條件（純音訊、容器與編碼相符、取樣率與聲道數不超過上限）"""
+        codec = summary['audio_codec']
+        if summary['video_codec'] or codec not in PASSTHROUGH_CODECS:
+            return False
+        if codec not in rules.get('codecs', list(PASSTHROUGH_CODECS)):
+            return False
+        container, _ = PASSTHROUGH_CODECS[codec]
+        if container not in (summary['format'] or '').split(','):
+            return False
+        return (
+            (summary['sample_rate'] or 0) <= rules.get('max_sample_rate', 16000)
+            and (summary['channels'] or 0) <= rules.get('max_channels', 2)
+        )
+
+    @property
+    def ext(self):
+        return PASSTHROUGH_CODECS[self.codec][1]
+
+    @property
+    def format(self):
+        return PASSTHROUGH_CODECS[self.codec][0]
+
+    def chunk_size(self, seconds):
+        """以來源平均位元率估計 seconds 秒片段的大小"""
+        return seconds * self.bits_per_second / 8 * 1.01
+
+    def encode_args(self):
+        """只複製音訊封包，不重新編碼"""
+        return ["-map", "0:a", "-c:a", "copy"]
+
+    def describe(self):
+        return f"直傳 {self.codec} {self.sample_rate}Hz {self.bitrate}（不重新編碼）"
+
+
+class CompressionPlanner:
+    """依音檔長度挑選能放進上傳上限、品質最好的壓縮組合"""
+
+    def __init__(self, profiles, max_bytes, safety_margin=0.95):
+        self.profiles = profiles
+        self.max_bytes = max_bytes
+        self.target_bytes = max_bytes * safety_margin
+
+    def predict_size(self, profile, duration):
+        """以位元率 × 長度預估壓縮後大小（bytes）"""
+        codec = CODECS[profile.get('codec', 'mp3')]
+        return duration * parse_bitrate(profile['bitrate']) / 8 * codec['overhead']
+
+    def plan(self, duration, aggressive=False):
+        """
+        回傳第一個（品質最高）預估大小低於目標的組合
+        都放不下時回傳最小的組合並標記 fits=False（需要分割）
+        """
+        profiles = self.profiles[-1:] if aggressive else self.profiles
+        for profile in profiles:
+            size = self.predict_size(profile, duration)
+            if size <= self.target_bytes:
+                return CompressionPlan(profile, duration, size, True)
+
+        profile = self.profiles[-1]
+        return CompressionPlan(profile, duration, self.predict_size(profile, duration), False)
+
+
+class CompressedAudio:
+    """壓縮後的音訊：小檔案保留在記憶體，大檔案寫入系統暫存目錄"""
+
+    def __init__(self, name, data=None, path=None, owned=True):
+        self.name = name  # 上傳時使用的檔名
+        self.data = data
+        self.path = path
+        self.owned = owned  # False = 直接上傳的原始檔，cleanup 時不刪除
+
+    @property
+    def in_memory(self):
+        return self.data is not None
+
+    @property
+    def size(self):
+        if self.in_memory:
+            return len(self.data)
+        return os.path.getsize(self.path)
+
+    def open(self):
+        """以檔案物件開啟（上傳時串流讀取）"""
+        if self.in_memory:
+            return io.BytesIO(self.data)
+        return open(self.path, 'rb')
+    
+    def read(self):
+        """取得完整內容"""
+        if self.in_memory:
+            return self.data
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def cleanup(self):
+        """刪除暫存檔（記憶體模式與原始檔不需處理）"""
+        if self.owned and self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+        return False
+
+
+def spool_ffmpeg(cmd, name, memory_limit, suffix=".mp3"):
+    """
+    執行輸出到 stdout 的 ffmpeg 指令並收集結果
+    在 memory_limit 以內保留在記憶體，超過時改寫入系統暫存目錄
+    不把 ffmpeg 輸出直接接到上傳請求：429 重試需從頭重新上傳、大檔案需分割，管線都無法倒回
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    buffer = bytearray()
+    tmp = None
+
+    try:
+        for block in iter(lambda: process.stdout.read(1024 * 1024), b''):
+            if tmp is None and len(buffer) + len(block) > memory_limit:
+                tmp = tempfile.NamedTemporaryFile(prefix="stt_", suffix=suffix, delete=False)
+                tmp.write(buffer)
+                buffer = None
+            if tmp is not None:
+                tmp.write(block)
+            else:
+                buffer.extend(block)
+
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
+    except BaseException:
+        process.kill()
+        process.wait()
+        if tmp is not None:
+            tmp.close()
+            os.remove(tmp.name)
+        raise
+    finally:
+        process.stdout.close()
+
+    if tmp is not None:
+        tmp.close()
+        return CompressedAudio(name, path=tmp.name)
+    return CompressedAudio(name, data=bytes(buffer))
@@ -0,0 +1,308 @@
+"""
+Daemon Module - 常駐轉錄服務，以本機 HTTP 接受工作並串流回傳進度
+"""
+import contextvars
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import sys
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 目前執行緒所屬的工作；STTEngine 的執行緒池會複製 context，片段執行緒的輸出也歸到同一個工作
+current_job = contextvars.ContextVar('current_job', default=None)
+
+
+def is_loopback(host):
+    """是否為只有本機能連線的位址"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def write_token(path):
+    """產生新的存取權杖，寫入只有擁有者可讀寫的檔案（每次啟動服務都會更換）"""
+    token = secrets.token_urlsafe(32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    os.chmod(path, 0o600)
+    return token
+
+
+def validate_params(params):
+    """檢查工作參數，回傳錯誤訊息（沒有問題時回傳 None）"""
+    if not isinstance(params, dict):
+        return '請求內容必須是 JSON 物件'
+    source = params.get('input')
+    if not source or not isinstance(source, str):
+        return '缺少 input'
+    if not os.path.isabs(source):
+        return 'input 必須是絕對路徑'
+    name = params.get('output_name')
+    if name is not None:
+        # 只接受單一層資料夾名稱，避免寫到輸出根目錄以外
+        if (not isinstance(name, str) or not name or os.path.isabs(name)
+                or '/' in name or '\\' in name or '..' in name):
+            return 'output_name 只能是單一資料夾名稱（不可為絕對路徑、含路徑分隔符號或 ..）'
+    return None
+
+
+class Job:
+    """一個轉錄工作：狀態、輸出紀錄（逐行）與結果"""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = 'queued'  # queued | running | done | failed
+        self.lines = []
+        self.result = None
+        self.error = None
+        self._partial = ''
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def write(self, text):
+        """收集 print 輸出，完整的行才加入紀錄"""
+        with self._cond:
+            self._partial += text
+            *lines, self._partial = self._partial.split('\n')
+            if lines:
+                self.lines.extend(lines)
+                self._cond.notify_all()
+
+    def set_status(self, status, result=None, error=None):
+        with self._cond:
+            if self._partial:
+                self.lines.append(self._partial)
+                self._partial = ''
+            self.status = status
+            self.result = result
+            self.error = error
+            self._cond.notify_all()
+
+    def wait(self, position, timeout=15):
+        """等待 position 之後的新紀錄或工作結束，回傳 (新紀錄, 是否已結束)"""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.lines) > position or self.finished, timeout)
+            return self.lines[position:], self.finished
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'result': self.result,
+            'error': self.error,
+            'lines': len(self.lines),
+        }
+
+
+class JobOutput:
+    """取代 sys.stdout：工作執行緒的輸出寫入該工作的紀錄，其餘照常輸出到終端"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        job = current_job.get()
+        if job is None:
+            return self.stream.write(text)
+        job.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class TranscriptionDaemon:
+    """
+    本機 HTTP 轉錄服務（handler 為實際執行工作的函式，回傳可 JSON 序列化的結果）
+    POST /jobs、GET /jobs/<id>、GET /jobs/<id>/events（NDJSON 串流）、GET /health
+    除 /health 外都需要 Authorization: Bearer <權杖>；權杖在啟動時寫入 token_path
+    """
+
+    def __init__(self, config, handler, token_path):
+        self.host = config.get('host', '127.0.0.1')
+        if not is_loopback(self.host):
+            raise ValueError(f"daemon.host 只能是本機位址（127.0.0.1 / ::1 / localhost），目前為 {self.host}")
+        self.port = config.get('port', 8765)
+        self.token_path = token_path
+        self.token = None
+        self.max_history = config.get('max_history', 500)
+        self.handler = handler
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.get('max_jobs', 2), thread_name_prefix='stt-job'
+        )
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, params):
+        """排入一個工作，回傳 Job"""
+        job = Job(params)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self):
+        """只保留最近 max_history 個已結束的工作"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self.jobs[job_id]
+
+    def _run(self, job):
+        token = current_job.set(job)
+        job.set_status('running')
+        try:
+            result = self.handler(job.params)
+        except SystemExit as e:
+            # 轉錄流程失敗時會呼叫 sys.exit，在服務中只結束這個工作
+            job.set_status('failed', error=f"結束代碼 {e.code}")
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+            job.set_status('failed', error=str(e) or type(e).__name__)
+        else:
+            job.set_status('done', result=result)
+        finally:
+            current_job.reset(token)
+        sys.__stdout__.write(f"[{job.id}] {job.status}：{job.params.get('input')}\n")
+
+    def authorized(self, header):
+        """Authorization 標頭是否帶有正確的權杖"""
+        scheme, _, token = (header or '').partition(' ')
+        return scheme == 'Bearer' and hmac.compare_digest(token.strip().encode('utf-8'), self.token.encode('utf-8'))
+
+    def serve_forever(self):
+        sys.stdout = JobOutput(sys.stdout)
+        server = ThreadingHTTPServer((self.host, self.port), _handler_class(self))
+        self.token = write_token(self.token_path)
+        print(f"🛰️  轉錄服務已啟動：http://{self.host}:{self.port}（Ctrl+C 停止）")
+        print(f"🔑 存取權杖：{self.token_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n已停止轉錄服務")
+        finally:
+            server.server_close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _handler_class(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, data):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _check_access(self):
+            """
+            拒絕瀏覽器發出的請求（帶 Origin 標頭，可能是網頁的跨站請求）與權杖錯誤的請求
+            通過時回傳 True，否則已回應錯誤
+            """
+            if self.headers.get('Origin') is not None:
+                self._send_json(403, {'error': '不接受瀏覽器發出的請求'})
+                return False
+            if not daemon.authorized(self.headers.get('Authorization')):
+                self._send_json(401, {'error': '缺少或錯誤的存取權杖'})
+                return False
+            return True
+
+        def _job_or_404(self, job_id):
+            job = daemon.get(job_id)
+            if job is None:
+                self._send_json(404, {'error': f"找不到工作 {job_id}"})
+            return job
+
+        def do_GET(self):
+            parts = self.path.strip('/').split('/')
+            if parts == ['health']:
+                self._send_json(200, {'status': 'ok', 'jobs': len(daemon.jobs)})
+            elif not self._check_access():
+                return
+            elif len(parts) == 2 and parts[0] == 'jobs':
+                job = self._job_or_404(parts[1])
+                if job:
+                    self._send_json(200, job.to_dict())
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+                job = self._job_or_404(parts[1])
+                if job:
+                    self._stream_events(job)
+            else:
+                self._send_json(404, {'error': '未知的路徑'})
+
+        def do_POST(self):
+            if self.path.strip('/') != 'jobs':
+                self._send_json(404, {'error': '未知的路徑'})
+                return
+            if not self._check_access():
+                return
+            content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type != 'application/json':
+                self._send_json(415, {'error': 'Content-Type 必須是 application/json'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                params = json.loads(self.rfile.read(length) or b'{}')
+            except (ValueError, json.JSONDecodeError):
+                self._send_json(400, {'error': '請求內容不是有效的 JSON'})
+                return
+            error = validate_params(params)
+            if error:
+                self._send_json(400, {'error': error})
+                return
+            job = daemon.submit(params)
+            self._send_json(202, job.to_dict())
+
+        def _stream_events(self, job):
+            """以 NDJSON 逐行回傳輸出紀錄，最後一行為工作結果"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+            self.end_headers()
+
+            position = 0
+            try:
+                while True:
+                    lines, finished = job.wait(position)
+                    for line in lines:
+                        self._write_event({'type': 'log', 'line': line})
+                    position += len(lines)
+                    if finished and position >= len(job.lines):
+                        break
+                self._write_event(dict(job.to_dict(), type='result'))
+            except (BrokenPipeError, ConnectionResetError):
+                # 用戶端中斷連線不影響工作本身
+                pass
+
+        def _write_event(self, event):
+            self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+    return Handler
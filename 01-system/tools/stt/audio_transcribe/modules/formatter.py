@@ -105,11 +105,11 @@ class Formatter:
         
         return text
     
-    def format_srt(self, segments):
-        """將 segments 格式化為 SRT"""
+    def format_srt(self, segments, start_index=1):
+        """將 segments 格式化為 SRT（start_index 供逐段寫入時接續編號）"""
         srt_content = ""
         
-        for i, segment in enumerate(segments, 1):
+        for i, segment in enumerate(segments, start_index):
             start = self._format_timestamp(segment['start'])
             end = self._format_timestamp(segment['end'])
             text = segment['text'].strip()
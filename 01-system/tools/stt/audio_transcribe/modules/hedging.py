@@ -0,0 +1,137 @@
+"""
+Hedging Module - 追蹤片段轉錄耗時，找出需要另送一份請求的慢片段
+"""
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class LatencyTracker:
+    """記錄已完成片段的耗時，超過指定百分位數的進行中片段視為慢片段"""
+
+    def __init__(self, percentile=95, min_samples=5):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._samples = []
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def start(self, index):
+        """
+        片段的 HTTP 請求開始送出（不含排隊、等待 Key 與速率限制的時間）
+        429 重試時重新計時
+        """
+        with self._lock:
+            self._started[index] = time.monotonic()
+
+    def finish(self, index):
+        with self._lock:
+            started = self._started.pop(index, None)
+            if started is not None:
+                self._samples.append(time.monotonic() - started)
+
+    def discard(self, index):
+        """片段已有結果（可能由重複請求取得），不再追蹤也不記錄耗時"""
+        with self._lock:
+            self._started.pop(index, None)
+
+    def threshold(self):
+        """目前的百分位數耗時；樣本不足時回傳 None"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        rank = math.ceil(self.percentile / 100 * len(ordered)) - 1
+        return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+    def overdue(self, exclude=()):
+        """耗時已超過門檻、仍在進行中的片段索引"""
+        limit = self.threshold()
+        if limit is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            return [
+                index for index, started in self._started.items()
+                if index not in exclude and now - started > limit
+            ]
+
+
+class RequestCancelled(Exception):
+    """同一片段的另一份請求已先完成"""
+
+
+class ChunkRequest:
+    """
+    片段的一份請求：送出 HTTP 請求時通知耗時追蹤（tracker 為 None 時不計時）
+    片段索引出現在 settled 後即視為取消：不再送出、不計入額度帳本、不改用 failover 引擎
+    """
+
+    def __init__(self, index, settled, tracker=None):
+        self.index = index
+        self.settled = settled
+        self.tracker = tracker
+
+    @property
+    def cancelled(self):
+        return self.index in self.settled
+
+    def check(self):
+        if self.cancelled:
+            raise RequestCancelled(f"片段 {self.index + 1} 已由另一份請求完成")
+
+    def sending(self):
+        """即將送出 HTTP 請求"""
+        self.check()
+        if self.tracker:
+            self.tracker.start(self.index)
+
+
+class DaemonExecutor:
+    """
+    以 daemon 執行緒執行的工作池（介面同 ThreadPoolExecutor 的 submit / shutdown）
+    落後的重複請求無法中途取消，daemon 執行緒讓它們不會阻擋程式結束
+    """
+
+    def __init__(self, max_workers):
+        self._queue = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args):
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
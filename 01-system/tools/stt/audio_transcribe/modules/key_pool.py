@@ -0,0 +1,221 @@
+"""
+Key Pool Module - 多 Key 排程與額度帳本
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+HOUR = 3600
+
+
+@contextmanager
+def _file_lock(path):
+    """跨程序的檔案鎖（POSIX 用 fcntl，Windows 用 msvcrt），離開時釋放"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK 重試約 10 秒後仍拿不到鎖會拋出，繼續等待
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _month_start(now):
+    """取得本月第一天 00:00 的時間戳"""
+    return datetime.fromtimestamp(now).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    ).timestamp()
+
+
+class QuotaLedger:
+    """
+    本地額度帳本：記錄每組 Key 在各時間點使用的分鐘數
+    多個 CLI 與常駐服務共用同一個帳本，讀取 → 合併 → 寫入期間以檔案鎖互斥
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def history(self, engine, key_id):
+        """取得某組 Key 的使用紀錄 [[時間戳, 分鐘], ...]"""
+        return self.entries.get(engine, {}).get(key_id, [])
+
+    def used(self, engine, key_id, since):
+        """統計某時間點之後已使用的分鐘數"""
+        return sum(minutes for ts, minutes in self.history(engine, key_id) if ts >= since)
+
+    def record(self, engine, key_id, minutes):
+        """寫入一筆使用紀錄（持有檔案鎖時重新讀取，合併其他程序的紀錄）"""
+        with self._lock, _file_lock(self.lock_path):
+            now = time.time()
+            self.entries = self._load()
+            history = self.entries.setdefault(engine, {}).setdefault(key_id, [])
+            history.append([round(now, 1), round(minutes, 2)])
+
+            # 只保留本月與最近一小時內的紀錄
+            cutoff = min(_month_start(now), now - HOUR)
+            for engine_entries in self.entries.values():
+                for k in list(engine_entries):
+                    engine_entries[k] = [e for e in engine_entries[k] if e[0] >= cutoff]
+
+            self._save()
+
+
+class KeyPool:
+    """將工作同時分散到所有仍有額度的 Key"""
+
+    def __init__(self, api_keys, engines_config, ledger):
+        self.api_keys = api_keys
+        self.engines_config = engines_config
+        self.ledger = ledger
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._reserved = {}
+
+    @staticmethod
+    def key_id(api_key):
+        """帳本只記錄 Key 的雜湊，不儲存 Key 本身"""
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+    def remaining(self, engine, api_key, now=None):
+        """
+        回傳 (每小時剩餘分鐘, 每月剩餘分鐘)
+        未設定的額度回傳 None
+        """
+        now = now or time.time()
+        config = self.engines_config.get(engine, {})
+        key_id = self.key_id(api_key)
+        reserved = self._reserved.get((engine, key_id), 0)
+
+        hourly = monthly = None
+        if config.get('hourly_quota'):
+            hourly = config['hourly_quota'] - self.ledger.used(engine, key_id, now - HOUR) - reserved
+        if config.get('monthly_quota'):
+            monthly = config['monthly_quota'] - self.ledger.used(engine, key_id, _month_start(now)) - reserved
+        return hourly, monthly
+
+    def _hourly_wait(self, engine, api_key, minutes, now):
+        """估算這組 Key 還要等多久才會釋出足夠的每小時額度"""
+        hourly, _ = self.remaining(engine, api_key, now)
+        key_id = self.key_id(api_key)
+        history = sorted(e for e in self.ledger.history(engine, key_id) if e[0] >= now - HOUR)
+        for ts, used in history:
+            hourly += used
+            if hourly >= minutes:
+                return max(ts + HOUR - now, 1)
+        # 額度被進行中的工作佔住，稍後再檢查
+        return 5
+
+    def try_acquire(self, engine, minutes, exclude=()):
+        """
+        嘗試取得一組可用的 Key，並預留 minutes 分鐘額度
+        優先選擇進行中工作最少、剩餘額度最多的 Key
+        回傳 (api_key, None)；每小時額度暫時不足時回傳 (None, 建議等待秒數)；
+        沒有任何 Key 可用時回傳 (None, None)
+        """
+        wait_times = []
+        with self._lock:
+            now = time.time()
+            candidates = []
+            for api_key in self.api_keys.get(engine, []):
+                if api_key in exclude:
+                    continue
+                hourly, monthly = self.remaining(engine, api_key, now)
+                if monthly is not None and monthly < minutes:
+                    continue
+                # 超過整小時額度的工作，只要求該 Key 這一小時內完全未使用
+                needed = min(minutes, self.engines_config.get(engine, {}).get('hourly_quota') or minutes)
+                if hourly is not None and hourly < needed:
+                    wait_times.append(self._hourly_wait(engine, api_key, needed, now))
+                    continue
+                limits = [r for r in (hourly, monthly) if r is not None]
+                left = min(limits) if limits else float('inf')
+                in_flight = self._in_flight.get((engine, self.key_id(api_key)), 0)
+                candidates.append((in_flight, -left, api_key))
+
+            if candidates:
+                candidates.sort(key=lambda c: (c[0], c[1]))
+                api_key = candidates[0][2]
+                slot = (engine, self.key_id(api_key))
+                self._in_flight[slot] = self._in_flight.get(slot, 0) + 1
+                self._reserved[slot] = self._reserved.get(slot, 0) + minutes
+                return api_key, None
+
+        return None, (min(wait_times) if wait_times else None)
+
+    def acquire(self, engine, minutes, exclude=(), block=True):
+        """
+        取得一組可用的 Key（見 try_acquire）
+        若只是每小時額度暫時不足，block=True 時會等待額度釋出
+        沒有任何 Key 可用時回傳 None
+        """
+        while True:
+            api_key, wait = self.try_acquire(engine, minutes, exclude)
+            if api_key is not None:
+                return api_key
+            if wait is None or not block:
+                return None
+
+            print(f"⏳ {engine} 每小時額度已滿，等待 {wait:.0f} 秒...")
+            time.sleep(min(wait, 60))
+
+    async def acquire_async(self, engine, minutes, exclude=()):
+        """acquire() 的非同步版本，等待額度期間不佔用事件迴圈"""
+        import asyncio
+
+        while True:
+            api_key, wait = self.try_acquire(engine, minutes, exclude)
+            if api_key is not None or wait is None:
+                return api_key
+
+            print(f"⏳ {engine} 每小時額度已滿，等待 {wait:.0f} 秒...")
+            await asyncio.sleep(min(wait, 60))
+
+    def release(self, engine, api_key, minutes, used=True):
+        """歸還 Key；used=True 時把實際使用的分鐘數寫入帳本"""
+        slot = (engine, self.key_id(api_key))
+        with self._lock:
+            self._in_flight[slot] = max(self._in_flight.get(slot, 0) - 1, 0)
+            self._reserved[slot] = max(self._reserved.get(slot, 0) - minutes, 0)
+        if used:
+            self.ledger.record(engine, slot[1], minutes)
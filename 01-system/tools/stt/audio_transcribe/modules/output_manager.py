@@ -63,6 +63,10 @@ class OutputManager:
             f.write(srt_content)
         files['srt_original'] = srt_path
         
+        # 詞級時間軸附檔（ElevenLabs）
+        if transcription.get('words'):
+            files['words'] = self.save_word_timeline(folder, basename, transcription['words'])
+        
         # 格式化版本（如果有）
         if formatted_text:
             txt_formatted_path = folder / f"{basename}_formatted.txt"
@@ -72,6 +76,14 @@ class OutputManager:
         
         return files
     
+    def save_word_timeline(self, folder, basename, words):
+        """儲存詞級時間軸 <basename>.words.npz（切片工具可直接查詢時間，不需重新解析 SRT）"""
+        from .word_timeline import WordTimeline
+        
+        path = folder / f"{basename}.words.npz"
+        WordTimeline.from_dict(words).save(path)
+        return path
+    
     def save_formatted_srt(self, folder, basename, formatted_srt):
         """儲存格式化的 SRT"""
         srt_formatted_path = folder / f"{basename}_formatted.srt"
@@ -79,6 +91,19 @@ class OutputManager:
             f.write(formatted_srt)
         return srt_formatted_path
     
+    def open_srt_stream(self, folder, basename, formatter=None):
+        """
+        開啟逐段寫入的 SRT（轉錄進行中檔案即可使用）
+        提供 formatter 時寫入格式化版本 <basename>_formatted.srt
+        """
+        if formatter:
+            path = folder / f"{basename}_formatted.srt"
+            render = formatter.format_srt
+        else:
+            path = folder / f"{basename}.srt"
+            render = self._generate_srt
+        return SRTStreamWriter(path, render)
+    
     def generate_metadata(self, folder, info):
         """生成 metadata.yaml"""
         metadata_path = folder / "_metadata.yaml"
@@ -107,10 +132,10 @@ class OutputManager:
         
         return metadata_path
     
-    def _generate_srt(self, segments):
+    def _generate_srt(self, segments, start_index=1):
         """生成基本 SRT（未格式化）"""
         srt_content = ""
-        for i, segment in enumerate(segments, 1):
+        for i, segment in enumerate(segments, start_index):
             start = self._format_timestamp(segment['start'])
             end = self._format_timestamp(segment['end'])
             text = segment['text'].strip()
@@ -124,3 +149,29 @@ class OutputManager:
         secs = int(seconds % 60)
         millis = int((seconds - int(seconds)) * 1000)
         return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+
+class SRTStreamWriter:
+    """逐段追加寫入 SRT，每次寫入後立即 flush"""
+    
+    def __init__(self, path, render):
+        self.path = path
+        self.render = render
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+    
+    def write(self, segments):
+        """追加 segments，字幕編號接續先前寫入的數量"""
+        self._file.write(self.render(segments, self.count + 1))
+        self._file.flush()
+        self.count += len(segments)
+    
+    def close(self):
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
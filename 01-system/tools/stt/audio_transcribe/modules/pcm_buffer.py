@@ -0,0 +1,82 @@
+"""
+PCM Buffer Module - 解碼一次為 16 kHz 單聲道 PCM 暫存檔，以 memmap 供能量分析與並行編碼共用
+"""
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PCMBuffer:
+    """s16le PCM 暫存檔；samples 為唯讀 memmap，由作業系統分頁載入，不整個讀進記憶體"""
+
+    def __init__(self, path, sample_rate=16000):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._samples = None
+
+    @classmethod
+    def decode(cls, input_path, path, sample_rate=16000):
+        """以 ffmpeg 將音檔解碼為 PCM 暫存檔"""
+        cmd = [
+            "ffmpeg", "-v", "error", "-y", "-i", str(input_path),
+            "-map", "0:a", "-ac", "1", "-ar", str(sample_rate),
+            "-f", "s16le", str(path)
+        ]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return cls(path, sample_rate)
+
+    @property
+    def samples(self):
+        import numpy as np
+
+        if self._samples is None:
+            if os.path.getsize(self.path) == 0:
+                self._samples = np.zeros(0, dtype=np.int16)
+            else:
+                self._samples = np.memmap(self.path, dtype=np.int16, mode='r')
+        return self._samples
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    def slice(self, start, end):
+        """start ~ end 秒的樣本（memmap 切片，不複製資料）"""
+        return self.samples[int(round(start * self.sample_rate)):int(round(end * self.sample_rate))]
+
+    def encode(self, start, end, plan, output_path):
+        """把一段樣本經由 stdin 餵給 ffmpeg 編碼為上傳格式"""
+        cmd = (
+            ["ffmpeg", "-v", "error", "-y", "-f", "s16le",
+             "-ar", str(self.sample_rate), "-ac", "1", "-i", "pipe:0"]
+            + plan.encode_args()
+            + ["-f", plan.format, str(output_path)]
+        )
+        data = memoryview(self.slice(start, end)).cast('B')
+        subprocess.run(cmd, input=data, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def encode_chunks(self, boundaries, plan, out_dir, workers, overlap=0):
+        """
+        依切點邊界（秒，含 0 與總長）同時啟動多個 ffmpeg 編碼各片段
+        overlap > 0 時每個片段向前後各延伸 overlap 秒，與相鄰片段重疊
+        回傳 [(片段路徑, 開始秒數, 結束秒數), ...]，格式與 read_segment_list 相同
+        """
+        chunks = []
+        total = boundaries[-1]
+        for start, end in zip(boundaries, boundaries[1:]):
+            if end - start <= 0:
+                continue
+            start, end = max(0.0, start - overlap), min(total, end + overlap)
+            path = os.path.join(out_dir, f"part{len(chunks):03d}{plan.ext}")
+            chunks.append((path, start, end))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            # 執行緒只負責把 memmap 切片寫進管線，實際編碼在各自的 ffmpeg 行程中並行
+            list(executor.map(lambda chunk: self.encode(chunk[1], chunk[2], plan, chunk[0]), chunks))
+        return chunks
+
+    def remove(self):
+        """刪除 PCM 暫存檔"""
+        self._samples = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
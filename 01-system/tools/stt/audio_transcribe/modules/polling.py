@@ -0,0 +1,37 @@
+"""
+Polling Module - 非同步送出的轉錄工作以退避間隔輪詢結果
+"""
+
+
+def backoff_delays(initial=2.0, maximum=30.0, timeout=3600, factor=1.5):
+    """輪詢間隔：由 initial 秒起每次乘上 factor，最多 maximum 秒；累計等待超過 timeout 即停止"""
+    delay = initial
+    waited = 0.0
+    while waited < timeout:
+        delay = min(delay, maximum, timeout - waited)
+        yield delay
+        waited += delay
+        delay *= factor
+
+
+def _status_code(error):
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def is_not_ready(error):
+    """輪詢時的「結果尚未產生」錯誤（404 / 425）"""
+    return _status_code(error) in (404, 425)
+
+
+def is_unsupported_submission(error):
+    """
+    非同步送出因帳號未設定 webhook 被拒，應改用同步送出
+    只比對錯誤內容提到 webhook 的 400 / 422，其他請求錯誤照常拋出
+    """
+    if _status_code(error) not in (400, 422):
+        return False
+    detail = getattr(error, 'body', None) or str(error)
+    return 'webhook' in str(detail).lower()
@@ -0,0 +1,143 @@
+"""
+Probe Cache Module - ffprobe 結果的磁碟快取，轉錄、切片與批次工具共用
+"""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 未指定時所有工具共用同一個快取目錄（本工具的 .cache/probes）
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "probes"
+
+MEDIA_EXTENSIONS = {
+    '.mp3', '.wav', '.m4a', '.aac', '.flac', '.ogg', '.opus', '.wma',
+    '.mp4', '.mov', '.mkv', '.avi', '.webm', '.m4v', '.mts',
+}
+
+
+def probe_command(path):
+    """取得完整媒體資訊（format + streams，JSON）的 ffprobe 指令"""
+    return [
+        "ffprobe", "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", str(path)
+    ]
+
+
+def keyframe_command(path):
+    """計算視訊關鍵影格數的 ffprobe 指令（只讀封包旗標，不解碼）"""
+    return [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=flags", "-of", "csv=p=0", str(path)
+    ]
+
+
+class ProbeCache:
+    """
+    以 (絕對路徑, 檔案大小, 修改時間) 為 key 快取 ffprobe JSON
+    檔案被修改或取代後 key 改變，自然不會讀到舊結果
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+
+    @staticmethod
+    def _key(path, stat):
+        identity = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def lookup(self, path):
+        """讀取快取，未命中回傳 None"""
+        key = self._key(path, os.stat(path))
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def store(self, path, probe, keyframes=None):
+        """寫入一筆 ffprobe 結果，回傳快取項目"""
+        stat = os.stat(path)
+        entry = {
+            'path': os.path.abspath(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'probe': probe,
+            'keyframes': keyframes,
+        }
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_path = self._entry_path(self._key(path, stat))
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, entry_path)
+        return entry
+
+    def probe(self, path, keyframes=False):
+        """取得媒體資訊（優先讀快取）；keyframes=True 時一併計算關鍵影格數"""
+        entry = self.lookup(path)
+        if entry is not None and (not keyframes or entry.get('keyframes') is not None):
+            return entry
+
+        if entry is None:
+            result = subprocess.run(probe_command(path), capture_output=True, text=True, check=True)
+            probe = json.loads(result.stdout)
+        else:
+            probe = entry['probe']
+
+        count = None
+        if keyframes and any(s.get('codec_type') == 'video' for s in probe.get('streams', [])):
+            result = subprocess.run(keyframe_command(path), capture_output=True, text=True, check=True)
+            count = sum(1 for line in result.stdout.splitlines() if 'K' in line)
+        return self.store(path, probe, count)
+
+    def duration(self, path):
+        """媒體長度（秒）"""
+        return media_summary(self.probe(path))['duration']
+
+    def preflight(self, paths, workers=8, keyframes=False):
+        """
+        並行探測多個檔案並寫入快取（ffprobe 為外部行程，執行緒只負責等待）
+        回傳 {路徑: 摘要或例外}
+        """
+        def run(path):
+            try:
+                return path, media_summary(self.probe(path, keyframes))
+            except Exception as e:
+                return path, e
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return dict(executor.map(run, paths))
+
+
+def media_summary(entry):
+    """從快取項目整理常用欄位"""
+    probe = entry['probe']
+    fmt = probe.get('format', {})
+    streams = probe.get('streams', [])
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), {})
+    video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+    return {
+        'duration': float(fmt.get('duration') or 0),
+        'size': entry['size'],
+        'format': fmt.get('format_name'),
+        'audio_codec': audio.get('codec_name'),
+        'sample_rate': int(audio['sample_rate']) if audio.get('sample_rate') else None,
+        'channels': audio.get('channels'),
+        'video_codec': video.get('codec_name'),
+        'keyframes': entry.get('keyframes'),
+    }
+
+
+def find_media(folder, recursive=True):
+    """列出資料夾中的媒體檔（依副檔名）"""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        path for path in Path(folder).glob(pattern)
+        if path.is_file() and path.suffix.lower() in MEDIA_EXTENSIONS
+    )
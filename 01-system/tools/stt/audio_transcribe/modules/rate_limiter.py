@@ -0,0 +1,144 @@
+"""
+Rate Limiter Module - 每組 (引擎, Key) 的 token bucket 速率控制，支援 Retry-After
+"""
+import random
+import re
+import threading
+import time
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+
+def parse_duration(value):
+    """
+    解析速率限制標頭的時間格式，回傳秒數
+    支援 '30'、'7.66s'、'2m59.56s'、'1h2m'、'120ms'
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    unit_seconds = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+    return sum(float(number) * unit_seconds[unit] for number, unit in parts)
+
+
+def is_rate_limited(error):
+    """判斷例外是否為 429 速率限制"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 429 or "429" in str(error)
+
+
+def _response_headers(error):
+    response = getattr(error, 'response', None)
+    return getattr(response, 'headers', None) or {}
+
+
+class TokenBucket:
+    """token bucket：平均每分鐘 rate_per_minute 次，最多累積 burst 次"""
+
+    def __init__(self, rate_per_minute=None, burst=1):
+        self.rate = rate_per_minute / 60 if rate_per_minute else None
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """嘗試取得一個 token；成功回傳 0，否則回傳需要等待的秒數"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.rate is None:
+                return 0
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """取得一個 token，必要時阻塞等待（只阻塞目前的執行緒）"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """暫停發送直到 seconds 秒後（伺服器要求等待時使用）"""
+        with self._lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated = now
+
+
+class RateLimiter:
+    """依引擎設定為每組 Key 建立獨立的 token bucket"""
+
+    def __init__(self, engines_config):
+        self.engines_config = engines_config
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, engine, api_key):
+        with self._lock:
+            slot = (engine, api_key)
+            if slot not in self._buckets:
+                config = self.engines_config.get(engine, {})
+                rpm = config.get('requests_per_minute')
+                burst = config.get('burst', max(1, (rpm or 0) // 10))
+                self._buckets[slot] = TokenBucket(rpm, burst)
+            return self._buckets[slot]
+
+    def wait(self, engine, api_key):
+        """發送請求前呼叫，依 token bucket 控制節奏"""
+        self.bucket(engine, api_key).acquire()
+
+    async def wait_async(self, engine, api_key):
+        """wait() 的非同步版本，等待期間不佔用事件迴圈"""
+        import asyncio
+
+        bucket = self.bucket(engine, api_key)
+        while True:
+            wait = bucket.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, engine, api_key, headers):
+        """依成功回應的速率限制標頭調整；剩餘次數歸零時暫停到重置時間"""
+        if not headers:
+            return
+        remaining = headers.get('x-ratelimit-remaining-requests')
+        if remaining is not None and str(remaining).strip() == '0':
+            reset = parse_duration(headers.get('x-ratelimit-reset-requests'))
+            if reset:
+                self.bucket(engine, api_key).pause(reset)
+
+    def on_rate_limited(self, engine, api_key, error, attempt):
+        """
+        處理 429：優先採用 Retry-After / 重置標頭，沒有時以指數退避估計
+        回傳此 Key 暫停的秒數
+        """
+        headers = _response_headers(error)
+        wait = (
+            parse_duration(headers.get('retry-after'))
+            or parse_duration(headers.get('x-ratelimit-reset-requests'))
+        )
+        if not wait:
+            wait = min(5 * (2 ** attempt), 120) * random.uniform(0.8, 1.2)
+        self.bucket(engine, api_key).pause(wait)
+        return wait
@@ -0,0 +1,57 @@
+"""
+Repair Module - 找出草稿轉錄中的低信心段落，並把重新轉錄的結果接回時間軸
+"""
+
+
+class RepairWindow:
+    """需要重新轉錄的時間範圍：segments[first:last + 1] 的起訖時間"""
+
+    def __init__(self, first, last, start, end):
+        self.first = first
+        self.last = last
+        self.start = start
+        self.end = end
+
+    def clip(self, padding, duration=None):
+        """重新轉錄時實際擷取的音訊範圍（前後多取 padding 秒作為上下文）"""
+        end = self.end + padding
+        if duration is not None:
+            end = min(end, duration)
+        return max(0.0, self.start - padding), end
+
+
+def low_confidence_windows(segments, min_confidence, merge_gap=1.0):
+    """
+    信心值低於 min_confidence 的連續段落合併為視窗
+    相鄰視窗間隔不到 merge_gap 秒時併成一個，減少請求數
+    沒有信心值的段落（例如 ElevenLabs 結果）視為可信
+    """
+    windows = []
+    for i, segment in enumerate(segments):
+        confidence = segment.get('confidence')
+        if confidence is None or confidence >= min_confidence:
+            continue
+        if windows and (windows[-1].last == i - 1 or segment['start'] - windows[-1].end < merge_gap):
+            windows[-1].last = i
+            windows[-1].end = max(windows[-1].end, segment['end'])
+        else:
+            windows.append(RepairWindow(i, i, segment['start'], segment['end']))
+    return windows
+
+
+def splice(segments, repairs):
+    """
+    以重新轉錄的段落取代各視窗內的草稿段落
+    repairs 為 [(視窗, 已換算為絕對時間的段落)]；只採用中點落在視窗內的段落，前後上下文丟棄
+    """
+    spliced = []
+    position = 0
+    for window, replacement in sorted(repairs, key=lambda item: item[0].first):
+        spliced.extend(segments[position:window.first])
+        spliced.extend(
+            s for s in replacement
+            if window.start <= (s['start'] + s['end']) / 2 < window.end
+        )
+        position = window.last + 1
+    spliced.extend(segments[position:])
+    return spliced
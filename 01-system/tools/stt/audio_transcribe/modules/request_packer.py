@@ -0,0 +1,109 @@
+"""
+Request Packer Module - 把多個短音檔以短靜音間隔串接成一次上傳，再依位移表拆回各檔結果
+"""
+import os
+import subprocess
+
+SAMPLE_RATE = 16000
+
+
+class PackEntry:
+    """打包中的一個檔案：offset 為在打包音檔中的起點，duration 為檔案長度（秒）"""
+
+    def __init__(self, path, offset, duration):
+        self.path = path
+        self.offset = offset
+        self.duration = duration
+
+
+class Pack:
+    """一次上傳的內容；每個檔案之後接 gap 秒靜音，offset 可直接由長度累加"""
+
+    def __init__(self, gap):
+        self.gap = gap
+        self.entries = []
+        self.duration = 0.0
+
+    def add(self, path, duration):
+        self.entries.append(PackEntry(path, self.duration, duration))
+        self.duration += duration + self.gap
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def plan_packs(items, max_seconds, max_clip_seconds=120, gap=1.5):
+    """
+    依序把短檔案裝進長度不超過 max_seconds 的打包，回傳 (打包列表, 不打包的檔案列表)
+    items 為 [(路徑, 長度秒數), ...]；長度超過 max_clip_seconds 或讀不到長度的檔案不打包
+    長度以毫秒為單位取整，打包時每段都補齊到這個長度，位移表才會精確
+    """
+    packs = []
+    singles = []
+    current = Pack(gap)
+    for path, duration in items:
+        if not duration or duration > max_clip_seconds:
+            singles.append(path)
+            continue
+        duration = round(duration, 3)
+        if current.entries and current.duration + duration + gap > max_seconds:
+            packs.append(current)
+            current = Pack(gap)
+        current.add(path, duration)
+    if current.entries:
+        packs.append(current)
+
+    # 只有一個檔案的打包沒有節省請求，照一般流程處理
+    singles += [pack.entries[0].path for pack in packs if len(pack) == 1]
+    return [pack for pack in packs if len(pack) > 1], singles
+
+
+def build_pack(pack, output_path, codec_args, fmt):
+    """
+    以 ffmpeg concat 濾鏡串接打包中的檔案並編碼為上傳格式
+    每個檔案先重取樣為 16 kHz 單聲道，截斷或補靜音到「長度 + gap」，確保與位移表一致
+    濾鏡寫入 filter script，避免檔案很多時指令列過長
+    """
+    inputs = []
+    filters = []
+    for i, entry in enumerate(pack.entries):
+        inputs += ["-i", str(entry.path)]
+        filters.append(
+            f"[{i}:a]aresample={SAMPLE_RATE},aformat=channel_layouts=mono,"
+            f"atrim=end={entry.duration:.3f},asetpts=PTS-STARTPTS,"
+            f"apad=whole_dur={entry.duration + pack.gap:.3f}[a{i}]"
+        )
+    labels = "".join(f"[a{i}]" for i in range(len(pack)))
+    filters.append(f"{labels}concat=n={len(pack)}:v=0:a=1[packed]")
+
+    script_path = f"{output_path}.filter"
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(";\n".join(filters))
+    try:
+        cmd = (
+            ["ffmpeg", "-v", "error", "-y"] + inputs
+            + ["-filter_complex_script", script_path, "-map", "[packed]"]
+            + codec_args + ["-f", fmt, str(output_path)]
+        )
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        os.remove(script_path)
+
+
+def unpack_segments(pack, segments):
+    """
+    依位移表把打包的 segments 分回各檔案（以 segment 中點所在的檔案區段為準）
+    時間換算為各檔案內的時間並限制在檔案長度內；回傳 {路徑: [segment dict, ...]}
+    """
+    results = {entry.path: [] for entry in pack.entries}
+    ends = [entry.offset + entry.duration + pack.gap for entry in pack.entries]
+    i = 0
+    for segment in segments:
+        middle = (segment['start'] + segment['end']) / 2
+        while i < len(ends) - 1 and middle >= ends[i]:
+            i += 1
+        entry = pack.entries[i]
+        start = min(max(segment['start'] - entry.offset, 0.0), entry.duration)
+        end = min(max(segment['end'] - entry.offset, start), entry.duration)
+        results[entry.path].append(dict(segment, start=start, end=end))
+    return results
@@ -0,0 +1,81 @@
+"""
+Result Cache Module - 以音檔內容雜湊為 key 的轉錄結果快取
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .segment_timeline import json_default
+
+
+class ResultCache:
+    """轉錄結果磁碟快取，超過容量上限時淘汰最久未使用的項目（LRU）"""
+
+    def __init__(self, cache_dir, max_size_mb=500):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size_mb * 1024 * 1024
+
+    @staticmethod
+    def hash_file(path, block_size=1024 * 1024):
+        """計算檔案內容的 SHA-256"""
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    @staticmethod
+    def make_key(audio_path, engine, model, prompt=None):
+        """音檔內容 + 引擎 + 模型 + 提示詞 組成快取 key"""
+        h = hashlib.sha256()
+        for part in (ResultCache.hash_file(audio_path), engine, model, prompt or ''):
+            h.update(str(part).encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        """讀取快取；命中時更新存取時間，未命中回傳 None"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        # 以 mtime 作為 LRU 的最後使用時間
+        os.utime(path)
+        return result
+
+    def put(self, key, result):
+        """寫入快取並依容量上限淘汰舊項目"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, default=json_default)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """刪除最久未使用的項目，直到總大小低於上限"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
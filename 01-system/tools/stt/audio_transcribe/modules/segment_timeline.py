@@ -0,0 +1,154 @@
+"""
+Segment Timeline Module - 精簡的段落時間軸，取代 Groq verbose_json 的原始 segment dict
+"""
+import math
+from array import array
+
+
+def _field(segment, name, default=None):
+    """同時支援 dict 與 SDK 物件形式的 segment"""
+    if isinstance(segment, dict):
+        return segment.get(name, default)
+    return getattr(segment, name, default)
+
+
+class Segment:
+    """
+    單一段落（只保留下游會用到的欄位）
+    支援 segment['start'] 形式的讀取，與原本的 dict 用法相容
+    """
+    __slots__ = ('start', 'end', 'text', 'speaker', 'confidence')
+
+    def __init__(self, start, end, text, speaker=None, confidence=None):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.speaker = speaker
+        self.confidence = confidence
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None and key in ('speaker', 'confidence'):
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key in self.__slots__ if self.get(key) is not None]
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __repr__(self):
+        return f"Segment({self.start:.2f}-{self.end:.2f} {self.text!r})"
+
+
+class SegmentTimeline:
+    """
+    段落時間軸（欄位式儲存）
+    starts / ends：每段的起訖秒數
+    offsets：每段在 text 中的起始字元位置（長度為段數 + 1）
+    speakers：說話者索引（-1 表示未知），對應 speaker_names
+    confidences：信心值 0~1（Groq 為 exp(avg_logprob) × (1 − no_speech_prob)，未知為 NaN）
+    迭代或索引時才產生 Segment 物件
+    """
+
+    def __init__(self, starts, ends, text, offsets, speakers, speaker_names, confidences):
+        self.starts = starts
+        self.ends = ends
+        self.text = text
+        self.offsets = offsets
+        self.speakers = speakers
+        self.speaker_names = speaker_names
+        self.confidences = confidences
+
+    @classmethod
+    def from_segments(cls, segments):
+        """由 verbose_json segments、dict 列表或 Segment 列表建立（已是時間軸時直接回傳）"""
+        if isinstance(segments, cls):
+            return segments
+
+        starts, ends, offsets = array('d'), array('d'), array('q', [0])
+        speakers, confidences = array('i'), array('f')
+        names, index, texts = [], {}, []
+        for segment in segments or ():
+            text = _field(segment, 'text') or ""
+            starts.append(float(_field(segment, 'start') or 0))
+            ends.append(float(_field(segment, 'end') or 0))
+            texts.append(text)
+            offsets.append(offsets[-1] + len(text))
+
+            speaker = _field(segment, 'speaker')
+            if speaker is not None and speaker not in index:
+                index[speaker] = len(names)
+                names.append(speaker)
+            speakers.append(-1 if speaker is None else index[speaker])
+
+            confidence = _field(segment, 'confidence')
+            if confidence is None:
+                logprob = _field(segment, 'avg_logprob')
+                no_speech = _field(segment, 'no_speech_prob') or 0.0
+                confidence = math.exp(logprob) * (1 - no_speech) if logprob is not None else math.nan
+            confidences.append(confidence)
+
+        return cls(starts, ends, "".join(texts), offsets, speakers, names, confidences)
+
+    @classmethod
+    def concat(cls, timelines):
+        """依序串接多個時間軸"""
+        return cls.from_segments(segment for timeline in timelines for segment in timeline)
+
+    def shifted(self, offset):
+        """回傳所有時間加上 offset 秒的新時間軸（文字與其他欄位共用）"""
+        return SegmentTimeline(
+            array('d', (start + offset for start in self.starts)),
+            array('d', (end + offset for end in self.ends)),
+            self.text, self.offsets, self.speakers, self.speaker_names, self.confidences
+        )
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _segment(self, i):
+        speaker = self.speakers[i]
+        confidence = self.confidences[i]
+        return Segment(
+            self.starts[i],
+            self.ends[i],
+            self.text[self.offsets[i]:self.offsets[i + 1]],
+            self.speaker_names[speaker] if speaker >= 0 else None,
+            None if math.isnan(confidence) else confidence
+        )
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._segment(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._segment(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._segment(i)
+
+    def to_list(self):
+        """轉為 dict 列表（寫入 JSON 快取用）"""
+        return [segment.to_dict() for segment in self]
+
+
+def json_default(value):
+    """json.dump 的 default：把時間軸與段落轉為可序列化的形式"""
+    if isinstance(value, SegmentTimeline):
+        return value.to_list()
+    if isinstance(value, Segment):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
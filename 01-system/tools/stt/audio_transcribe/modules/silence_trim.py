@@ -0,0 +1,152 @@
+"""
+Silence Trim Module - 上傳前剪除長靜音、加速播放，並記錄上傳音檔時間對應回原始時間的對照表
+"""
+import os
+import re
+import subprocess
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .segment_timeline import SegmentTimeline
+
+# 以 10 ms 為格點剪接：asetnsamples 把音訊切成 10 ms 的 frame，aselect 依 frame 起點選取
+GRID = 0.01
+SAMPLE_RATE = 16000
+
+SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def detect_silences(input_path, noise="-35dB", min_silence=2.0):
+    """以 ffmpeg silencedetect 找出長度至少 min_silence 秒的靜音，回傳 [(開始, 結束), ...]"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats", "-i", str(input_path), "-map", "0:a",
+        "-af", f"silencedetect=noise={noise}:d={min_silence}", "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def _snap(seconds):
+    return round(round(seconds / GRID) * GRID, 2)
+
+
+def kept_intervals(silences, duration, keep=0.3):
+    """
+    由靜音區間算出要保留的音訊區間（靜音前後各保留 keep 秒，避免切到字尾或字首）
+    音檔開頭與結尾的靜音整段剪除；區間端點對齊 10 ms 格點，剪接後的時間才能精確對應
+    """
+    kept = []
+    position = 0.0
+    for start, end in silences:
+        cut_start = _snap(start + keep) if start > 0 else 0.0
+        cut_end = _snap(end - keep) if end < duration else _snap(duration)
+        if cut_end - cut_start < GRID:
+            continue
+        if cut_start > position:
+            kept.append((position, cut_start))
+        position = cut_end
+    end = _snap(duration)
+    if end > position:
+        kept.append((position, end))
+    return kept
+
+
+def atempo_filter(tempo):
+    """atempo 濾鏡（單一 atempo 只接受 0.5 ~ 2.0，超過時串接多個）"""
+    factors = []
+    while tempo > 2.0:
+        factors.append(2.0)
+        tempo /= 2.0
+    factors.append(tempo)
+    return ",".join(f"atempo={factor:.6g}" for factor in factors)
+
+
+class TimeMap:
+    """
+    上傳音檔的時間 → 原始音檔時間
+    先乘上 tempo 還原加速，再依保留區間分段平移（每個區間平移一個常數）
+    """
+
+    def __init__(self, intervals, tempo=1.0):
+        self.intervals = intervals
+        self.tempo = tempo
+        self.trimmed_starts = []
+        position = 0.0
+        for start, end in intervals:
+            self.trimmed_starts.append(position)
+            position += end - start
+        self.kept_duration = position
+        self.trimmed_duration = position / tempo
+
+    def to_source(self, t, end=False):
+        """
+        上傳音檔的時間換算為原始時間
+        end=True 時剛好落在剪接點的時間歸入前一個區間（段落結尾不跨到靜音之後）
+        """
+        t *= self.tempo
+        if not self.intervals:
+            return t
+        search = bisect_left if end else bisect_right
+        i = max(0, search(self.trimmed_starts, t) - 1)
+        return self.intervals[i][0] + (t - self.trimmed_starts[i])
+
+    def remap_segments(self, segments):
+        """把 segments 的時間換算回原始時間，回傳新的 SegmentTimeline"""
+        timeline = SegmentTimeline.from_segments(segments)
+        return SegmentTimeline(
+            array('d', (self.to_source(t) for t in timeline.starts)),
+            array('d', (self.to_source(t, end=True) for t in timeline.ends)),
+            timeline.text, timeline.offsets,
+            timeline.speakers, timeline.speaker_names, timeline.confidences
+        )
+
+    def remap_words(self, words):
+        """換算 WordTimeline.to_dict() 格式的詞級時間"""
+        return dict(
+            words,
+            start=[self.to_source(t) for t in words['start']],
+            end=[self.to_source(t, end=True) for t in words['end']]
+        )
+
+
+def prepare_audio(input_path, output_path, intervals=None, tempo=1.0):
+    """
+    只保留 intervals 內的音訊（None = 全部保留）並以 tempo 倍速播放
+    輸出 16 kHz 單聲道 FLAC（無損，後續仍會依規劃壓縮）
+    選取條件寫入 filter script，避免區間很多時指令列過長
+    """
+    filters = [f"aresample={SAMPLE_RATE}", "aformat=channel_layouts=mono"]
+    if intervals is not None:
+        condition = "+".join(f"gte(t,{start:.2f})*lt(t,{end:.2f})" for start, end in intervals)
+        filters += [
+            f"asetnsamples=n={int(SAMPLE_RATE * GRID)}:p=0",
+            f"aselect='{condition}'",
+            "asetpts=N/SR/TB",
+        ]
+    if tempo != 1.0:
+        filters.append(atempo_filter(tempo))
+
+    script_path = f"{output_path}.filter"
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(",".join(filters))
+    try:
+        cmd = [
+            "ffmpeg", "-v", "error", "-y", "-i", str(input_path), "-map", "0:a",
+            "-filter_script:a", script_path, "-c:a", "flac", str(output_path)
+        ]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        os.remove(script_path)
@@ -0,0 +1,105 @@
+"""
+Stitcher Module - 合併有重疊的片段轉錄結果，對齊重疊區並去除重複內容
+"""
+from difflib import SequenceMatcher
+
+
+def _trim(segment, keep_from, keep_to):
+    """保留 segment 文字的 [keep_from, keep_to) 部分，時間依字數比例調整"""
+    text = segment['text']
+    length = max(len(text), 1)
+    span = segment['end'] - segment['start']
+    return dict(
+        segment,
+        text=text[keep_from:keep_to],
+        start=segment['start'] + span * keep_from / length,
+        end=segment['start'] + span * keep_to / length
+    )
+
+
+class ChunkStitcher:
+    """
+    依片段順序接收結果（segments 已換算為絕對時間），回傳可輸出的 segments
+    落在與下一片段重疊區的 segments 會先保留，等下一片段到達後再對齊
+    """
+
+    def __init__(self, min_match=4):
+        self.min_match = min_match
+        self.pending = []  # 上一片段在重疊區內、尚未輸出的 segments
+        self.pending_end = None  # 上一片段的結束時間
+
+    def add(self, segments, start, end, next_start=None):
+        """
+        加入一個片段；next_start 為下一片段的開始時間（最後一個片段為 None）
+        回傳已確定不會再變動的 segments
+        """
+        if self.pending_end is not None and start < self.pending_end:
+            segments = self._align(self.pending, segments, start, self.pending_end)
+        else:
+            segments = self.pending + list(segments)
+
+        if next_start is not None and next_start < end:
+            ready = [s for s in segments if s['end'] <= next_start]
+            self.pending = segments[len(ready):]
+            self.pending_end = end
+        else:
+            ready = segments
+            self.pending = []
+            self.pending_end = None
+        return ready
+
+    def _align(self, tail, segments, overlap_start, overlap_end):
+        """
+        tail 為前一片段在重疊區內的 segments，segments 為目前片段的全部 segments
+        在重疊區文字中找最長相同段落，前一片段保留到段落中點、目前片段從中點接續
+        找不到足夠長的相同段落時，改以重疊區時間中點切開
+        """
+        head_count = 0
+        while head_count < len(segments) and segments[head_count]['start'] < overlap_end:
+            head_count += 1
+        head, rest = list(segments[:head_count]), list(segments[head_count:])
+
+        tail_text = "".join(s['text'] for s in tail)
+        head_text = "".join(s['text'] for s in head)
+        match = SequenceMatcher(None, tail_text, head_text, autojunk=False).find_longest_match(
+            0, len(tail_text), 0, len(head_text)
+        )
+
+        if match.size < self.min_match:
+            cut = (overlap_start + overlap_end) / 2
+            kept_tail = [s for s in tail if (s['start'] + s['end']) / 2 < cut]
+            kept_head = [s for s in head if (s['start'] + s['end']) / 2 >= cut]
+            return kept_tail + kept_head + rest
+
+        half = match.size // 2
+        kept_tail = self._cut_after(tail, match.a + half)
+        kept_head = self._cut_before(head, match.b + half)
+        return kept_tail + kept_head + rest
+
+    @staticmethod
+    def _cut_after(segments, position):
+        """保留合併文字中 position 之前的內容"""
+        kept = []
+        offset = 0
+        for segment in segments:
+            length = len(segment['text'])
+            if offset + length <= position:
+                kept.append(segment)
+            elif offset < position:
+                kept.append(_trim(segment, 0, position - offset))
+            offset += length
+        return [s for s in kept if s['text'].strip()]
+
+    @staticmethod
+    def _cut_before(segments, position):
+        """保留合併文字中 position 之後的內容"""
+        kept = []
+        offset = 0
+        for segment in segments:
+            length = len(segment['text'])
+            if offset >= position:
+                kept.append(segment)
+            elif offset + length > position:
+                kept.append(_trim(segment, position - offset, length))
+            offset += length
+        return [s for s in kept if s['text'].strip()]
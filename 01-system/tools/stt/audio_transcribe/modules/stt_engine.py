@@ -1,18 +1,54 @@
 """
 STT Engine Module - 雙引擎支援 (ElevenLabs + Groq)
 """
+import contextvars
 import os
 import sys
 import subprocess
-import glob
+import shutil
+import tempfile
+import time
 import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 
+from .audio_splitter import SilenceSplitPlanner, read_segment_list
+from .chunk_journal import ChunkJournal
+from .client_pool import ClientPool
+from .compressor import CompressedAudio, CompressionPlanner, PassthroughPlan, spool_ffmpeg
+from .hedging import ChunkRequest, DaemonExecutor, LatencyTracker, RequestCancelled
+from .key_pool import KeyPool, QuotaLedger
+from .pcm_buffer import PCMBuffer
+from .polling import backoff_delays, is_not_ready, is_unsupported_submission
+from .probe_cache import ProbeCache, media_summary
+from .rate_limiter import RateLimiter, is_rate_limited
+from .repair import low_confidence_windows, splice
+from .request_packer import build_pack, plan_packs, unpack_segments
+from .result_cache import ResultCache
+from .segment_timeline import SegmentTimeline
+from .silence_trim import TimeMap, detect_silences, kept_intervals, prepare_audio
+from .stitcher import ChunkStitcher
+from .word_timeline import WordTimeline, fill_times, split_segments
+
+
+class TranscriptionError(RuntimeError):
+    """單一檔案轉錄失敗（呼叫端決定要結束程式或只略過這個檔案）"""
+
+
 class STTEngine:
     def __init__(self, config_path="config.yaml"):
         self.config = self._load_config(config_path)
+        self.base_dir = Path(config_path).resolve().parent
         self.api_keys = self._load_api_keys()
+        self.key_pool = self._create_key_pool()
+        self.result_cache = self._create_result_cache()
+        self.compression_planner = self._create_compression_planner()
+        self.rate_limiter = RateLimiter(self.config['engines'])
+        self.clients = ClientPool()
+        self.probe_cache = self._create_probe_cache()
+        self.elevenlabs_planner = self._create_compression_planner('elevenlabs')
+        self._elevenlabs_sync_only = False  # 非同步送出被拒後改用同步送出
         
     def _load_config(self, path):
         import yaml
@@ -47,6 +83,77 @@ class STTEngine:
         
         return keys
     
+    def _resolve_path(self, path):
+        """相對路徑以設定檔所在目錄為基準"""
+        path = Path(path)
+        return path if path.is_absolute() else self.base_dir / path
+    
+    def _create_key_pool(self):
+        """建立 Key 池與額度帳本"""
+        ledger_path = self.config.get('quota', {}).get('ledger_path', '.cache/quota_ledger.json')
+        ledger = QuotaLedger(self._resolve_path(ledger_path))
+        return KeyPool(self.api_keys, self.config['engines'], ledger)
+    
+    def _create_result_cache(self):
+        """建立轉錄結果快取（設定停用時回傳 None）"""
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('enabled', True):
+            return None
+        return ResultCache(
+            self._resolve_path(cache_config.get('dir', '.cache/results')),
+            cache_config.get('max_size_mb', 500)
+        )
+    
+    def _create_probe_cache(self):
+        """建立媒體資訊快取（未設定目錄時與其他工具共用預設目錄）"""
+        cache_dir = self.config.get('probe_cache', {}).get('dir')
+        return ProbeCache(self._resolve_path(cache_dir) if cache_dir else None)
+    
+    def _open_journal(self, job_key):
+        """開啟片段續傳紀錄（設定停用時回傳 None）"""
+        journal_config = self.config.get('journal', {})
+        if not journal_config.get('enabled', True):
+            return None
+        journal_dir = self._resolve_path(journal_config.get('dir', '.cache/journals'))
+        return ChunkJournal(journal_dir, job_key)
+    
+    def _call_with_key(self, engine, minutes, func, exclude=(), request=None):
+        """
+        從 Key 池取得有額度的 Key 執行 func(api_key)
+        失敗時改用下一組 Key，成功後把使用分鐘數記入帳本；exclude 中的 Key 不使用
+        request（ChunkRequest）已取消時不再取 Key；送出前就取消的不計入帳本，已回傳的結果仍計入但不採用
+        """
+        tried = set(exclude)
+        last_error = None
+        
+        while True:
+            if request:
+                request.check()
+            api_key = self.key_pool.acquire(engine, minutes, exclude=tried)
+            if api_key is None:
+                break
+            
+            try:
+                result = func(api_key)
+            except Exception as e:
+                self.key_pool.release(engine, api_key, minutes, used=False)
+                if isinstance(e, RequestCancelled) or (request and request.cancelled):
+                    raise
+                tried.add(api_key)
+                last_error = e
+                print(f"⚠️  {engine} Key #{self.api_keys[engine].index(api_key) + 1} 失敗: {str(e)}")
+                continue
+            
+            # 回應已回來就用到了 Key 的額度，落後的重複請求也要記入帳本
+            self.key_pool.release(engine, api_key, minutes)
+            if request:
+                request.check()  # 另一份請求已先完成，這份結果不採用
+            return result
+        
+        if last_error:
+            raise last_error
+        raise RuntimeError(f"所有 {engine} API Keys 的額度都已用盡")
+    
     def get_available_engines(self):
         """取得可用引擎及其狀態"""
         engines = {}
@@ -73,35 +180,191 @@ class STTEngine:
         
         return engines
     
-    def compress_audio(self, input_path, aggressive=False):
-        """壓縮音檔"""
-        base, ext = os.path.splitext(input_path)
-        output_path = f"{base}_compressed.mp3"
+    def _create_compression_planner(self, engine='groq'):
+        """建立壓縮規劃器，目標大小以該引擎的單檔上傳上限為準"""
+        compression = self.config['compression']
+        default_mb = 25 if engine == 'groq' else 1000
+        max_bytes = self.config['engines'][engine].get('max_file_size', default_mb) * 1024 * 1024
+        return CompressionPlanner(
+            compression['profiles'], max_bytes, compression.get('safety_margin', 0.95)
+        )
+    
+    def compress_audio(self, input_path, aggressive=False, duration=None, plan=None):
+        """
+        依壓縮規劃壓縮音檔（ffmpeg 經由管線輸出，不在來源目錄寫入暫存檔）
+        結果小於 memory_limit_mb 時保留在記憶體，否則寫入系統暫存目錄
+        """
+        if plan is None:
+            if duration is None:
+                duration = self._get_duration(input_path)
+            plan = self.compression_planner.plan(duration, aggressive)
         
-        # 根據檔案大小選擇壓縮參數
-        file_size_mb = os.path.getsize(input_path) / (1024 * 1024)
+        print(f"壓縮中... {plan.describe()}，預估 {plan.predicted_size / (1024 * 1024):.1f} MB")
         
-        if file_size_mb >= 20 or aggressive:
-            # 大檔案：激進壓縮
-            params = self.config['compression']['large_file']
-        else:
-            # 小檔案：標準壓縮
-            params = self.config['compression']['small_file']
+        cmd = (
+            ["ffmpeg", "-v", "error", "-i", input_path]
+            + plan.encode_args()
+            + ["-f", plan.format, "pipe:1"]
+        )
+        
+        # 需要分割的大檔案一定要落地成檔案，因此上限不超過單檔上傳上限
+        memory_limit = min(
+            self.config['compression'].get('memory_limit_mb', 24) * 1024 * 1024,
+            self.compression_planner.max_bytes
+        )
+        name = f"{Path(input_path).stem}{plan.ext}"
+        compressed = spool_ffmpeg(cmd, name, memory_limit, suffix=plan.ext)
+        
+        print(f"壓縮完成：實際 {compressed.size / (1024 * 1024):.1f} MB")
+        return compressed
+    
+    def _max_single_seconds(self):
+        """
+        單次上傳的長度上限（秒）：max_single_minutes，未設定時為每小時額度
+        超過時即使壓得進上傳上限也分割，片段才能並行，單一請求也不會超過 Key 的每小時額度
+        """
+        groq_config = self.config['engines']['groq']
+        minutes = groq_config.get('max_single_minutes') or groq_config.get('hourly_quota')
+        return minutes * 60 if minutes else float('inf')
+    
+    def _split_plan(self, duration):
+        """分割時的壓縮規劃：以最長可能的片段長度規劃，確保每個片段都放得進上傳上限"""
+        groq_config = self.config['engines']['groq']
+        longest_chunk = (
+            groq_config['chunk_duration'] + groq_config.get('silence_search_window', 30)
+            + 2 * groq_config.get('chunk_overlap', 0)
+        )
+        return self.compression_planner.plan(min(duration, longest_chunk))
+    
+    def _split_command(self, input_path, plan, split_times, tmp_dir):
+        """
+        組出同時壓縮與分割的 ffmpeg 指令（split_times 為 None 時固定長度分割）
+        回傳 (指令, 片段清單路徑)
+        """
+        list_path = os.path.join(tmp_dir, "segments.csv")
         
-        print(f"壓縮中... ({file_size_mb:.1f} MB)")
+        cmd = (
+            ["ffmpeg", "-v", "error", "-i", str(input_path)]
+            + plan.encode_args()
+            + ["-f", "segment", "-segment_format", plan.format]
+        )
         
-        cmd = [
-            "ffmpeg", "-y", "-i", input_path,
-            "-map", "0:a", "-ac", str(params['channels']),
-            "-ar", str(params['sample_rate']), "-b:a", params['bitrate'],
-            output_path
+        if split_times is None:
+            cmd += ["-segment_time", str(self.config['engines']['groq']['chunk_duration'])]
+        elif split_times:
+            cmd += ["-segment_times", ",".join(f"{t:.3f}" for t in split_times)]
+        
+        cmd += [
+            "-segment_list", list_path, "-segment_list_type", "csv",
+            "-reset_timestamps", "1", os.path.join(tmp_dir, f"part%03d{plan.ext}")
         ]
+        return cmd, list_path
+    
+    def _passthrough_plan(self, input_path, duration):
+        """
+        依 ffprobe 結果判斷輸入能否不重新編碼直接上傳（避免二次有損編碼與多一次完整轉碼）
+        符合 passthrough 設定時回傳 PassthroughPlan，否則回傳 None
+        """
+        rules = self.config.get('passthrough', {})
+        if not rules.get('enabled', True):
+            return None
+        try:
+            summary = media_summary(self.probe_cache.probe(input_path))
+        except Exception:
+            return None
+        if not PassthroughPlan.accepts(summary, rules):
+            return None
+        return PassthroughPlan(summary, duration, self.compression_planner.target_bytes)
+    
+    def _split_source_plan(self, input_path, duration):
+        """分割時的規劃：來源符合直傳條件且片段放得進上傳上限時以 -c copy 分割，否則壓縮"""
+        plan = self._passthrough_plan(input_path, duration)
+        if plan and plan.chunk_size(self._split_plan(duration).duration) <= self.compression_planner.target_bytes:
+            return plan
+        return self._split_plan(duration)
+    
+    def _compress_and_split(self, input_path, duration):
+        """
+        以單一 ffmpeg 流程同時壓縮與分割，並輸出含精確起訖時間的片段清單
+        來源已符合上傳條件時只複製封包分割，不重新編碼（需要片段重疊時仍改用並行編碼）
+        回傳 (暫存目錄, [(片段路徑, 開始秒數, 結束秒數), ...], 壓縮規劃)
+        """
+        plan = self._split_source_plan(input_path, duration)
+        overlap = self.config['engines']['groq'].get('chunk_overlap', 0)
+        if (overlap or not plan.passthrough) and self._parallel_encoding():
+            return self._decode_and_encode(input_path, self._split_plan(duration))
+        split_times = self._plan_silence_splits(input_path)
+        
+        tmp_dir = tempfile.mkdtemp(prefix="stt_chunks_")
+        cmd, list_path = self._split_command(input_path, plan, split_times, tmp_dir)
         
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return output_path
+        try:
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return tmp_dir, read_segment_list(list_path), plan
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    
+    def _parallel_encoding(self):
+        """
+        是否使用「解碼一次 + 並行編碼」模式（需要 numpy）
+        片段重疊只能由此模式產生，設定 chunk_overlap 時自動採用
+        """
+        groq_config = self.config['engines']['groq']
+        overlap = groq_config.get('chunk_overlap', 0)
+        if groq_config.get('chunk_encoding', 'segment') != 'parallel' and not overlap:
+            return False
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            note = "，片段不重疊" if overlap else ""
+            print(f"⚠️  未安裝 numpy，改用單一 ffmpeg 壓縮分割{note}（pip install numpy）")
+            return False
+        return True
+    
+    def _decode_and_encode(self, input_path, plan):
+        """
+        解碼一次為 PCM 暫存檔（memmap），靜音分析與各片段編碼都讀同一份資料
+        各片段由多個 ffmpeg 行程同時編碼，回傳值同 _compress_and_split
+        """
+        groq_config = self.config['engines']['groq']
+        tmp_dir = tempfile.mkdtemp(prefix="stt_chunks_")
+        
+        try:
+            buffer = PCMBuffer.decode(input_path, os.path.join(tmp_dir, "audio.pcm"))
+            duration = buffer.duration
+            
+            split_times = self._plan_silence_splits(input_path, samples=buffer.samples)
+            if split_times is None:
+                step = groq_config['chunk_duration']
+                split_times = [float(t) for t in range(step, int(duration), step)]
+            
+            workers = groq_config.get('encode_workers') or os.cpu_count() or 1
+            print(f"並行編碼 {len(split_times) + 1} 個片段（{workers} 個 ffmpeg）...")
+            chunks = buffer.encode_chunks(
+                [0.0] + split_times + [duration], plan, tmp_dir, workers,
+                overlap=groq_config.get('chunk_overlap', 0)
+            )
+            buffer.remove()
+            return tmp_dir, chunks, plan
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    
+    @staticmethod
+    def _compression_report(plan, actual_size):
+        """壓縮規劃與實際結果（寫入 metadata）"""
+        return {
+            'codec': plan.codec,
+            'sample_rate': plan.sample_rate,
+            'bitrate': plan.bitrate,
+            'predicted_mb': round(plan.predicted_size / (1024 * 1024), 2),
+            'actual_mb': round(actual_size / (1024 * 1024), 2),
+            'passthrough': plan.passthrough,
+        }
     
     def transcribe_elevenlabs(self, audio_path):
-        """使用 ElevenLabs Scribe 轉錄 (支援多 Key 輪替)"""
+        """使用 ElevenLabs Scribe 轉錄 (由 Key 池分配 Key)"""
         try:
             from elevenlabs import ElevenLabs
         except ImportError:
@@ -113,63 +376,158 @@ class STTEngine:
         if not keys:
             print("錯誤：未找到 ElevenLabs API Key")
             sys.exit(1)
-            
-        last_error = None
         
-        for i, api_key in enumerate(keys):
-            try:
-                print(f"嘗試使用第 {i+1} 組 ElevenLabs Key 轉錄...")
-                client = ElevenLabs(api_key=api_key)
-                
-                with open(audio_path, "rb") as f:
-                    response = client.speech_to_text.convert(
-                        file=f,
-                        model_id="scribe_v1",
-                        language_code="zh",  # 繁體中文
-                        diarize=True,  # 啟用說話者識別
-                        timestamps_granularity="word"  # 詞級時間戳
+        duration = self._get_duration(audio_path)
+        audio = self._elevenlabs_upload(audio_path, duration)
+        
+        try:
+            response = self._call_with_key(
+                'elevenlabs', duration / 60, lambda api_key: self._elevenlabs_convert(api_key, audio)
+            )
+        except Exception:
+            print("❌ 所有 API Keys 都嘗試失敗")
+            raise
+        finally:
+            audio.cleanup()
+        
+        print("✅ ElevenLabs 轉錄成功")
+        return self._elevenlabs_result(response)
+    
+    def _elevenlabs_upload(self, audio_path, duration):
+        """
+        準備 ElevenLabs 上傳內容（回傳 CompressedAudio，呼叫端負責 cleanup）
+        符合直傳條件時上傳原始檔，否則以 ElevenLabs 上傳上限套用壓縮規劃
+        """
+        name = Path(audio_path).name
+        if not self.config['engines']['elevenlabs'].get('compress', True):
+            return CompressedAudio(name, path=str(audio_path), owned=False)
+        
+        source = self._passthrough_plan(audio_path, duration)
+        if source and source.size <= self.elevenlabs_planner.target_bytes:
+            print(f"上傳 ElevenLabs：{source.describe()}，{source.size / (1024 * 1024):.1f} MB")
+            return CompressedAudio(f"{Path(audio_path).stem}{source.ext}", path=str(audio_path), owned=False)
+        return self.compress_audio(audio_path, plan=self.elevenlabs_planner.plan(duration))
+    
+    def _elevenlabs_async(self):
+        """是否以非同步方式送出 ElevenLabs 工作（送出後輪詢結果）"""
+        submission = self.config['engines']['elevenlabs'].get('submission', 'sync')
+        return submission == 'async' and not self._elevenlabs_sync_only
+    
+    def _disable_elevenlabs_async(self, error):
+        """非同步送出被拒時，本行程之後改用同步送出"""
+        if not self._elevenlabs_sync_only:
+            print(f"⚠️  ElevenLabs 非同步送出被拒（{error}），改用同步送出")
+        self._elevenlabs_sync_only = True
+    
+    def _elevenlabs_poll_delays(self):
+        """輪詢間隔（退避）"""
+        elevenlabs_config = self.config['engines']['elevenlabs']
+        return backoff_delays(
+            elevenlabs_config.get('poll_interval', 2),
+            elevenlabs_config.get('poll_max_interval', 30),
+            elevenlabs_config.get('poll_timeout', 3600)
+        )
+    
+    def _elevenlabs_convert(self, api_key, audio, request=None):
+        """
+        送出一次 ElevenLabs 轉錄請求（audio 為檔案路徑或 CompressedAudio）
+        非同步模式下送出後立即釋放連線，再以退避間隔輪詢結果
+        request（ChunkRequest）在送出前通知耗時追蹤，已取消時不送出
+        """
+        client = self.clients.get('elevenlabs', api_key)
+        if not isinstance(audio, CompressedAudio):
+            audio = CompressedAudio(Path(audio).name, path=str(audio), owned=False)
+        
+        self.rate_limiter.wait('elevenlabs', api_key)
+        if request:
+            request.sending()
+        transcription_id = None
+        with audio.open() as f:
+            if self._elevenlabs_async():
+                try:
+                    submitted = client.speech_to_text.convert(
+                        file=(audio.name, f), webhook=True, **self._elevenlabs_params()
                     )
-                
-                # 轉換為統一格式
-                result = {
-                    'text': response.text,
-                    'segments': []
-                }
-                
-                # 處理 segments
-                if hasattr(response, 'words'):
-                    current_segment = {'start': None, 'end': 0, 'text': ''}
-                    for word in response.words:
-                        if word.start is not None and current_segment['start'] is None:
-                            current_segment['start'] = word.start
-                        if word.end is not None:
-                            current_segment['end'] = word.end
-                        current_segment['text'] += word.text
-                        
-                        # 每 10 個詞或遇到停頓就分段
-                        if len(current_segment['text'].split()) >= 10:
-                            if current_segment['start'] is None: current_segment['start'] = 0
-                            result['segments'].append(current_segment.copy())
-                            current_segment = {'start': None, 'end': word.end or 0, 'text': ''}
-                    
-                    if current_segment['text']:
-                        result['segments'].append(current_segment)
-                
-                print(f"✅ 使用第 {i+1} 組 Key 轉錄成功")
-                return result
-                
+                    transcription_id = submitted.transcription_id
+                except Exception as e:
+                    if not is_unsupported_submission(e):
+                        raise
+                    self._disable_elevenlabs_async(e)
+                    f.seek(0)
+            if transcription_id is None:
+                return client.speech_to_text.convert(file=(audio.name, f), **self._elevenlabs_params())
+        
+        for delay in self._elevenlabs_poll_delays():
+            time.sleep(delay)
+            try:
+                return client.speech_to_text.transcripts.get(transcription_id=transcription_id)
             except Exception as e:
-                print(f"⚠️  第 {i+1} 組 Key 失敗: {str(e)}")
-                last_error = e
-                continue
+                if not is_not_ready(e):
+                    raise
+        raise TimeoutError(f"ElevenLabs 工作 {transcription_id} 逾時仍未完成")
+    
+    @staticmethod
+    def _elevenlabs_params():
+        """ElevenLabs speech_to_text.convert 參數"""
+        return {
+            'model_id': "scribe_v1",
+            'language_code': "zh",  # 繁體中文
+            'diarize': True,  # 啟用說話者識別
+            'timestamps_granularity': "word"  # 詞級時間戳
+        }
+    
+    @staticmethod
+    def _elevenlabs_result(response):
+        """將 ElevenLabs 回應轉換為統一格式"""
+        result = {
+            'text': response.text,
+            'segments': []
+        }
+        
+        # 詞級時間軸：保留原始時間戳，並依標點 / 停頓 / 說話者重新分段
+        words = getattr(response, 'words', None)
+        if words:
+            try:
+                timeline = WordTimeline.from_words(words)
+            except ImportError:
+                # 沒有 numpy 時不保留詞級時間軸，分段規則相同
+                print("⚠️  未安裝 numpy，無法建立詞級時間軸（pip install numpy）")
+                words = [word for word in words if getattr(word, 'type', 'word') != 'audio_event']
+                starts, ends = fill_times([word.start for word in words], [word.end for word in words])
+                result['segments'] = split_segments(
+                    starts, ends,
+                    [word.text or '' for word in words],
+                    [getattr(word, 'speaker_id', None) for word in words]
+                )
+            else:
+                result['segments'] = timeline.segments()
+                result['words'] = timeline.to_dict()
         
-        print("❌ 所有 API Keys 都嘗試失敗")
-        raise last_error
+        result['segments'] = SegmentTimeline.from_segments(result['segments'])
+        return result
     
-    def transcribe_groq(self, audio_path):
-        """使用 Groq Whisper 轉錄（支援大檔案分割和多 Key 輪替）"""
+    @staticmethod
+    def _groq_result(transcription):
+        """將 Groq verbose_json 回應轉換為統一格式（只保留時間、文字與信心值）"""
+        return {
+            'text': transcription.text,
+            'segments': SegmentTimeline.from_segments(transcription.segments)
+        }
+    
+    def transcribe_groq(self, audio_path, job_key=None):
+        """
+        使用 Groq Whisper 轉錄（支援大檔案分割，由 Key 池分配 Key）
+        job_key 用於片段續傳紀錄，未提供時依音檔內容計算
+        """
+        stream = TranscriptionStream(self._iter_groq(audio_path, job_key))
+        for _ in stream:
+            pass
+        return stream.result
+    
+    def _iter_groq(self, audio_path, job_key=None):
+        """transcribe_groq 的串流版本：每完成一個片段產出其 segments 列表，最後回傳完整結果"""
         try:
-            from groq import Groq
+            import groq  # noqa: F401
         except ImportError:
             print("錯誤：未安裝 groq 套件")
             print("請執行：pip install groq")
@@ -179,139 +537,709 @@ class STTEngine:
         if not keys:
             print("錯誤：未找到 Groq API Key")
             sys.exit(1)
-
-        # 嘗試使用第一個可用的 Key 進行初始化
-        # 注意：Groq 的分割轉錄邏輯較複雜，這裡簡化為使用第一個成功的 Key
-        # 如果需要更細粒度的 Key 輪替（例如在 chunk 失敗時切換），邏輯會更複雜
         
-        for i, api_key in enumerate(keys):
-            try:
-                print(f"嘗試使用第 {i+1} 組 Groq Key...")
-                client = Groq(api_key=api_key)
-                
-                # 簡單測試 Key 是否有效 (可選)
-                # 這裡直接進行轉錄流程
-                
-                compressed_path = self.compress_audio(audio_path)
-                file_size_mb = os.path.getsize(compressed_path) / (1024 * 1024)
+        try:
+            # 依長度規劃壓縮組合，不超過單次上傳長度且放得進上傳上限就不分割
+            duration = self._get_duration(audio_path)
+            single = duration <= self._max_single_seconds()
+            
+            # 輸入已是符合上傳條件的壓縮音訊（例如批次流程抽出的 16 kHz mp3）：不經 ffmpeg 直接上傳
+            source = self._passthrough_plan(audio_path, duration)
+            if single and source and source.fits:
+                print(f"使用 Groq Whisper 轉錄中... {source.describe()}，{source.size / (1024 * 1024):.1f} MB")
+                audio = CompressedAudio(f"{Path(audio_path).stem}{source.ext}", path=str(audio_path), owned=False)
+                result = self._call_with_key(
+                    'groq', duration / 60,
+                    lambda api_key: self._transcribe_groq_single(api_key, audio)
+                )
+                result['compression'] = self._compression_report(source, source.size)
+                yield result['segments']
+                return result
+            
+            plan = self.compression_planner.plan(duration)
+            
+            # 可直傳的來源放不進單次上傳時直接以 -c copy 分割，不重新壓縮為單一檔案
+            if single and plan.fits and not source:
+                compressed = self.compress_audio(audio_path, plan=plan)
+                try:
+                    if compressed.size <= self.compression_planner.target_bytes:
+                        # 小檔案：直接轉錄
+                        print(f"使用 Groq Whisper 轉錄中... ({compressed.size / (1024 * 1024):.1f} MB)")
+                        result = self._call_with_key(
+                            'groq', duration / 60,
+                            lambda api_key: self._transcribe_groq_single(api_key, compressed)
+                        )
+                        result['compression'] = self._compression_report(plan, compressed.size)
+                        yield result['segments']
+                        return result
+                    print("⚠️  實際大小超過上傳上限，改為分割處理")
+                finally:
+                    compressed.cleanup()
+            
+            # 長音檔或大檔案：壓縮並分割，每個片段各自向 Key 池取 Key
+            if source:
+                print(f"來源不需重新編碼（{source.size / (1024 * 1024):.1f} MB），以 -c copy 分割處理中...")
+            elif not single:
+                print(f"音檔長 {duration / 60:.0f} 分鐘，超過單次上傳上限 {self._max_single_seconds() / 60:.0f} 分鐘，壓縮並分割處理中...")
+            else:
+                print(f"檔案較大 (最小壓縮仍需 {plan.predicted_size / (1024 * 1024):.1f} MB)，壓縮並分割處理中...")
+            return (yield from self._iter_groq_chunked(
+                audio_path, duration, job_key or self._cache_key(audio_path, 'groq')
+            ))
                 
-                if file_size_mb < 24:
-                    # 小檔案：直接轉錄
-                    print(f"使用 Groq Whisper 轉錄中... ({file_size_mb:.1f} MB)")
-                    result = self._transcribe_groq_single(client, compressed_path)
-                    os.remove(compressed_path)
-                    return result
-                else:
-                    # 大檔案：分割轉錄
-                    print(f"檔案較大 ({file_size_mb:.1f} MB)，分割處理中...")
-                    result = self._transcribe_groq_chunked(client, compressed_path)
-                    os.remove(compressed_path)
-                    return result
-                    
+        except Exception as e:
+            print(f"⚠️  Groq 轉錄失敗: {str(e)}")
+            print("❌ 所有 Groq API Keys 都嘗試失敗")
+            print("已完成的片段已記錄，重新執行即可從中斷處續傳")
+            raise TranscriptionError(f"Groq 轉錄失敗：{e}") from e
+    
+    def _groq_request(self, api_key, name, file, model=None, request=None):
+        """
+        送出一次 Groq 轉錄請求（file 為二進位檔案物件，以串流方式上傳，不整個讀進記憶體）
+        model 未指定時使用 _groq_model()
+        由速率限制器控制節奏；遇到 429 依 Retry-After 暫停這組 Key 後重試
+        request（ChunkRequest）在每次送出前通知耗時追蹤，已取消時不再送出
+        """
+        client = self.clients.get('groq', api_key)
+        groq_config = self.config['engines']['groq']
+        max_retries = max(1, groq_config.get('max_retries', 10))  # 至少送出一次
+        
+        for attempt in range(max_retries):
+            self.rate_limiter.wait('groq', api_key)
+            if request:
+                request.sending()
+            file.seek(0)
+            try:
+                raw = client.audio.transcriptions.with_raw_response.create(
+                    file=(name, file), **self._groq_params(model)
+                )
             except Exception as e:
-                print(f"⚠️  第 {i+1} 組 Key 失敗: {str(e)}")
-                if os.path.exists(f"{os.path.splitext(audio_path)[0]}_compressed.mp3"):
-                     os.remove(f"{os.path.splitext(audio_path)[0]}_compressed.mp3")
+                if not is_rate_limited(e) or attempt == max_retries - 1:
+                    raise
+                wait = self.rate_limiter.on_rate_limited('groq', api_key, e, attempt)
+                print(f"速率限制，此 Key 暫停 {wait:.0f} 秒後重試（{attempt + 1}/{max_retries}）...")
                 continue
-                
-        print("❌ 所有 Groq API Keys 都嘗試失敗")
-        sys.exit(1)
-    
-    def _transcribe_groq_single(self, client, audio_path):
-        """Groq 單檔轉錄"""
-        with open(audio_path, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=(os.path.basename(audio_path), file.read()),
-                model="whisper-large-v3",
-                prompt="繁體中文",
-                response_format="verbose_json",
-                timestamp_granularities=["segment"]
+            
+            self.rate_limiter.update_from_headers('groq', api_key, raw.headers)
+            return raw.parse()
+    
+    def _groq_params(self, model=None):
+        """Groq transcriptions.create 參數"""
+        groq_config = self.config['engines']['groq']
+        return {
+            'model': model or self._groq_model(),
+            'prompt': groq_config.get('prompt', "繁體中文"),
+            'response_format': "verbose_json",
+            'timestamp_granularities': ["segment"]
+        }
+    
+    def _groq_model(self):
+        """第一輪轉錄使用的 Groq 模型（啟用兩階段轉錄時為較快的草稿模型）"""
+        repair = self._repair_config()
+        if repair:
+            return repair.get('draft_model', 'whisper-large-v3-turbo')
+        return self.config['engines']['groq']['model']
+    
+    def _repair_config(self):
+        """兩階段轉錄設定；未啟用時回傳 None"""
+        repair = self.config.get('repair', {})
+        return repair if repair.get('enabled') else None
+    
+    def _repair_engine(self):
+        """重新轉錄低信心段落的引擎（設定為 elevenlabs 但沒有 Key 時改用 Groq 主模型）"""
+        engine = self._repair_config().get('engine', 'groq')
+        if engine == 'elevenlabs' and not self.api_keys['elevenlabs']:
+            return 'groq'
+        return engine
+    
+    def repair(self, audio_path, result):
+        """對已完成的草稿結果執行低信心段落修補（非同步引擎使用）"""
+        def draft():
+            yield result['segments']
+            return result
+        
+        stream = TranscriptionStream(self._iter_repaired(audio_path, draft()))
+        for _ in stream:
+            pass
+        return stream.result
+    
+    def _iter_repaired(self, audio_path, draft):
+        """
+        逐批修補草稿：每收到一批 segments 就重新轉錄其中的低信心視窗再產出
+        修補時草稿的其餘片段仍在背景上傳；回傳以修補後 segments 重建全文的完整結果
+        """
+        repaired = []
+        windows = 0
+        seconds = 0.0
+        while True:
+            try:
+                segments = next(draft)
+            except StopIteration as stop:
+                result = stop.value
+                break
+            
+            batch, count, length = self._repair_segments(audio_path, segments)
+            windows += count
+            seconds += length
+            repaired.extend(batch)
+            yield batch
+        
+        if windows:
+            print(f"🔧 已重新轉錄 {windows} 個低信心視窗，共 {seconds:.0f} 秒")
+        return dict(
+            result,
+            text="".join(segment['text'] for segment in repaired).strip(),
+            segments=SegmentTimeline.from_segments(repaired),
+            repair={'windows': windows, 'seconds': round(seconds, 1), 'engine': self._repair_engine()}
+        )
+    
+    def _repair_segments(self, audio_path, segments):
+        """重新轉錄一批 segments 中的低信心視窗，回傳 (接回後的 segments, 視窗數, 秒數)"""
+        repair = self._repair_config()
+        segments = list(segments)
+        windows = low_confidence_windows(
+            segments, repair.get('min_confidence', 0.5), repair.get('merge_gap', 1.0)
+        )
+        if not windows:
+            return segments, 0, 0.0
+        
+        padding = repair.get('padding', 1.0)
+        duration = self._get_duration(audio_path)
+        
+        def run(window):
+            start, end = window.clip(padding, duration)
+            try:
+                return window, self._transcribe_window(audio_path, start, end)
+            except Exception as e:
+                print(f"⚠️  {start:.1f}-{end:.1f} 秒重新轉錄失敗（{e}），保留草稿")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max(1, repair.get('max_workers', 4))) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, run, window) for window in windows
+            ]
+            repairs = [future.result() for future in futures]
+        repairs = [item for item in repairs if item is not None]
+        
+        seconds = sum(window.end - window.start for window, _ in repairs)
+        return splice(segments, repairs), len(repairs), seconds
+    
+    def _transcribe_window(self, audio_path, start, end):
+        """以修補引擎重新轉錄 start ~ end 秒，回傳已換算為絕對時間的 segments"""
+        plan = self.compression_planner.plan(end - start)
+        tmp_dir = tempfile.mkdtemp(prefix="stt_repair_")
+        clip = os.path.join(tmp_dir, f"window{plan.ext}")
+        try:
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-ss", f"{start:.3f}", "-to", f"{end:.3f}",
+                 "-i", str(audio_path), "-map", "0:a"]
+                + plan.encode_args()
+                + ["-f", plan.format, clip],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
             )
+            minutes = (end - start) / 60
+            if self._repair_engine() == 'elevenlabs':
+                response = self._call_with_key(
+                    'elevenlabs', minutes, lambda api_key: self._elevenlabs_convert(api_key, clip)
+                )
+                result = self._elevenlabs_result(response)
+            else:
+                model = self.config['engines']['groq']['model']
+                
+                def create(api_key):
+                    with open(clip, "rb") as file:
+                        return self._groq_result(self._groq_request(api_key, os.path.basename(clip), file, model))
+                
+                result = self._call_with_key('groq', minutes, create)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return SegmentTimeline.from_segments(result['segments']).shifted(start)
+    
+    def _transcribe_groq_single(self, api_key, audio):
+        """Groq 單檔轉錄（audio 為 CompressedAudio）"""
+        with audio.open() as file:
+            transcription = self._groq_request(api_key, audio.name, file)
         
+        return self._groq_result(transcription)
+    
+    def _iter_groq_chunked(self, audio_path, duration, job_key):
+        """
+        Groq 分割轉錄（多執行緒並行處理片段，片段分散到所有 Key）
+        每個完成的片段立即寫入續傳紀錄；依片段順序逐段產出 segments，最後回傳完整結果
+        """
+        tmp_dir, chunks, plan = self._compress_and_split(audio_path, duration)
+        actual_size = sum(os.path.getsize(chunk) for chunk, _, _ in chunks)
+        print(f"壓縮分割完成：{plan.describe()}，共 {actual_size / (1024 * 1024):.1f} MB")
+        
+        journal = self._open_journal(job_key)
+        results = [None] * len(chunks)
+        pending = []
+        for i, (_, start, end) in enumerate(chunks):
+            if journal is not None:
+                results[i] = journal.get(i, start, end)
+            if results[i] is None:
+                pending.append(i)
+        
+        if len(pending) < len(chunks):
+            print(f"♻️  從續傳紀錄恢復 {len(chunks) - len(pending)} 個片段，剩餘 {len(pending)} 個")
+        
+        # 並行數隨 Key 數量成長
+        per_key = self.config['engines']['groq'].get('max_workers', 4)
+        max_workers = max(1, min(per_key * len(self.api_keys['groq']), len(pending) or 1))
+        print(f"共 {len(chunks)} 個片段，並行數 {max_workers}")
+        
+        merged = []
+        stitched = []
+        stitcher = ChunkStitcher()
+        
+        def emit_ready():
+            """
+            產出從目前位置起連續完成的片段（片段可能不依序完成）
+            片段有重疊時，重疊區的 segments 等下一片段完成、去除重複後才產出
+            """
+            while len(merged) < len(chunks) and results[len(merged)] is not None:
+                i = len(merged)
+                part = self._merge_chunks([results[i]], [chunks[i][1]])
+                merged.append(part)
+                next_start = chunks[i + 1][1] if i + 1 < len(chunks) else None
+                ready = stitcher.add(part['segments'], chunks[i][1], chunks[i][2], next_start)
+                stitched.extend(ready)
+                if ready:
+                    yield ready
+        
+        failover = self.config.get('failover', {})
+        tracker = None
+        if failover.get('hedging'):
+            # 重複請求需要另一組 Groq Key 或可用的 failover 引擎
+            if failover.get('hedge_target', 'key') == 'engine':
+                can_hedge = self._failover_engine() is not None
+            else:
+                can_hedge = len(self.api_keys['groq']) > 1
+            if can_hedge:
+                tracker = LatencyTracker(
+                    failover.get('hedge_percentile', 95), failover.get('hedge_min_samples', 5)
+                )
+            else:
+                print("⚠️  沒有可供重複請求的 Key 或引擎，停用 hedging")
+        active_keys = {}
+        settled = set()  # 已有結果的片段；同一片段落後的另一份請求據此取消
+        
+        def run(i, hedge=False):
+            chunk, start, end = chunks[i]
+            minutes = (end - start) / 60
+            # 只有第一份請求計入耗時樣本
+            request = ChunkRequest(i, settled, None if hedge else tracker)
+            if not hedge:
+                result = self._transcribe_groq_chunk(
+                    chunk, minutes, on_key=lambda api_key: active_keys.__setitem__(i, api_key),
+                    request=request
+                )
+            elif failover.get('hedge_target', 'key') == 'engine':
+                result = self._transcribe_failover_chunk(chunk, minutes, request)
+            else:
+                result = self._transcribe_groq_chunk(
+                    chunk, minutes, exclude={active_keys.get(i)} - {None}, allow_failover=False,
+                    request=request
+                )
+            if tracker and not hedge:
+                tracker.finish(i)
+            return result
+        
+        if tracker:
+            # 進行中的 HTTP 請求無法中途取消：落後的請求改在 daemon 執行緒上跑，不阻擋程式結束
+            executor = DaemonExecutor(max_workers)
+            hedge_executor = DaemonExecutor(max(1, max_workers // 2))
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            hedge_executor = None
+        try:
+            # 複製 context，讓片段執行緒的輸出歸屬到呼叫端（常駐服務依此分流各工作的進度）
+            futures = {executor.submit(contextvars.copy_context().run, run, i): i for i in pending}
+            outstanding = set(futures)
+            hedged = set()
+            
+            # 從續傳紀錄恢復的開頭片段可立即產出
+            yield from emit_ready()
+            
+            while outstanding:
+                done, outstanding = wait(
+                    outstanding, timeout=1.0 if tracker else None, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    i = futures[future]
+                    if results[i] is not None:
+                        continue  # 另一份請求已先完成
+                    try:
+                        results[i] = future.result()
+                    except Exception:
+                        # 同一片段還有另一份請求在進行時，等待那一份
+                        if any(futures[other] == i for other in outstanding):
+                            continue
+                        raise
+                    settled.add(i)
+                    if tracker:
+                        tracker.discard(i)
+                    if journal is not None:
+                        journal.record(i, chunks[i][1], chunks[i][2], results[i])
+                    print(f"片段 {i+1}/{len(chunks)} 轉錄完成")
+                    # 不再等待落後的另一份請求
+                    outstanding = {other for other in outstanding if futures[other] != i}
+                    yield from emit_ready()
+                
+                if tracker:
+                    for i in tracker.overdue(exclude=hedged):
+                        if results[i] is None:
+                            hedged.add(i)
+                            print(f"🐢 片段 {i+1} 超過 p{tracker.percentile} 耗時 {tracker.threshold():.1f} 秒，另送一份請求")
+                            future = hedge_executor.submit(contextvars.copy_context().run, run, i, True)
+                            futures[future] = i
+                            outstanding.add(future)
+        finally:
+            # 落後的請求在下次送出前發現已取消即結束，不拖慢整體完成時間
+            settled.update(range(len(chunks)))
+            executor.shutdown(wait=False, cancel_futures=True)
+            if hedge_executor:
+                hedge_executor.shutdown(wait=False, cancel_futures=True)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        overlapped = any(chunks[i + 1][1] < chunks[i][2] for i in range(len(chunks) - 1))
+        result = {
+            # 重疊時各片段全文含重複內容，改由去重後的 segments 組成全文
+            'text': ("".join(s['text'] for s in stitched).strip() if overlapped
+                     else " ".join(part['text'] for part in merged)),
+            'segments': SegmentTimeline.from_segments(stitched),
+            'compression': self._compression_report(plan, actual_size)
+        }
+        if journal is not None:
+            journal.remove()
+        return result
+    
+    @staticmethod
+    def _merge_chunks(results, offsets):
+        """依片段順序合併轉錄結果，並把時間戳加上片段起點"""
+        # 時間偏移直接取自片段清單的起點，不累加各片段長度
         return {
-            'text': transcription.text,
-            'segments': transcription.segments
+            'text': " ".join(transcription['text'] for transcription in results).strip(),
+            'segments': SegmentTimeline.concat(
+                SegmentTimeline.from_segments(transcription['segments']).shifted(offset)
+                for transcription, offset in zip(results, offsets)
+            )
         }
     
-    def _transcribe_groq_chunked(self, client, audio_path):
-        """Groq 分割轉錄"""
-        chunks = self._split_audio(audio_path)
+    def _transcribe_groq_chunk(self, chunk, minutes, exclude=(), on_key=None, allow_failover=True, request=None):
+        """
+        轉錄單一片段（向 Key 池取 Key，速率限制只會讓這個片段等待）
+        所有 Groq Key 都失敗時改用 failover 引擎轉錄這個片段；on_key(api_key) 在取得 Key 時呼叫
+        request（ChunkRequest）取消後不再重試，也不改用 failover 引擎
+        """
+        def create(api_key):
+            if on_key:
+                on_key(api_key)
+            with open(chunk, "rb") as file:
+                transcription = self._groq_request(api_key, os.path.basename(chunk), file, request=request)
+            return self._groq_result(transcription)
         
-        full_text = ""
-        all_segments = []
-        time_offset = 0.0
+        try:
+            return self._call_with_key('groq', minutes, create, exclude, request)
+        except Exception as e:
+            if not allow_failover or not self._failover_engine() or (request and request.cancelled):
+                raise
+            print(f"⚠️  片段 {os.path.basename(chunk)} Groq 失敗（{e}），改用 {self._failover_engine()}")
+            return self._transcribe_failover_chunk(chunk, minutes, request)
+    
+    def _failover_engine(self):
+        """片段失敗時改用的引擎；未設定或沒有 Key 時回傳 None"""
+        engine = self.config.get('failover', {}).get('engine')
+        if engine == 'elevenlabs' and self.api_keys['elevenlabs']:
+            return engine
+        return None
+    
+    def _transcribe_failover_chunk(self, chunk, minutes, request=None):
+        """以 failover 引擎轉錄單一片段（時間戳為片段內的相對時間，與 Groq 片段相同）"""
+        if not self._failover_engine():
+            raise RuntimeError("未設定可用的 failover 引擎")
         
-        for i, chunk in enumerate(chunks, 1):
-            print(f"轉錄片段 {i}/{len(chunks)}...")
-            
-            # 重試邏輯
-            max_retries = 10
-            for attempt in range(max_retries):
+        response = self._call_with_key(
+            'elevenlabs', minutes, lambda api_key: self._elevenlabs_convert(api_key, chunk, request),
+            request=request
+        )
+        result = self._elevenlabs_result(response)
+        return {'text': result['text'], 'segments': result['segments']}
+    
+    def _plan_silence_splits(self, input_path, samples=None):
+        """
+        以能量包絡規劃靜音切點（提供已解碼的 samples 時不再解碼）
+        設定為固定長度分割或缺少 numpy 時回傳 None（改用固定長度）
+        """
+        if self.config['engines']['groq'].get('split_method', 'silence') != 'silence':
+            return None
+        
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            print("⚠️  未安裝 numpy，改用固定長度分割（pip install numpy）")
+            return None
+        
+        groq_config = self.config['engines']['groq']
+        planner = SilenceSplitPlanner(
+            chunk_duration=groq_config['chunk_duration'],
+            search_window=groq_config.get('silence_search_window', 30)
+        )
+        split_times = planner.plan(input_path) if samples is None else planner.plan_samples(samples)
+        print(f"靜音切點：{len(split_times)} 個")
+        return split_times
+    
+    def _get_duration(self, file_path):
+        """取得音檔長度（經由媒體資訊快取，同一檔案只執行一次 ffprobe）"""
+        return self.probe_cache.duration(file_path)
+    
+    def _cache_key(self, audio_path, engine, preprocess=True):
+        """
+        依音檔內容與引擎參數計算工作 key（結果快取與片段續傳紀錄共用）
+        preprocess=False 表示呼叫端不剪除靜音也不加速（非同步引擎），key 不含這兩項設定
+        """
+        engine_config = self.config['engines'][engine]
+        model = engine_config['model']
+        repair = self._repair_config() if engine == 'groq' else None
+        if repair:
+            # 兩階段轉錄的結果與單一模型不同，key 需包含草稿模型與修補設定
+            model = f"{self._groq_model()}+{self._repair_engine()}:{model}@{repair.get('min_confidence', 0.5)}"
+        trim = self._silence_config() if preprocess else None
+        if trim:
+            # 剪除靜音後的片段切點不同，續傳紀錄與快取不可與未剪除的結果共用
+            model = f"{model}|trim:{trim.get('noise', '-35dB')}/{trim.get('min_silence', 2.0)}/{trim.get('keep', 0.3)}"
+        tempo = self._tempo(engine) if preprocess else 1.0
+        if tempo != 1.0:
+            model = f"{model}|tempo:{tempo:g}"
+        return ResultCache.make_key(
+            audio_path, engine, model, engine_config.get('prompt')
+        )
+    
+    def transcribe(self, audio_path, engine, use_cache=True):
+        """統一的轉錄介面（先查結果快取）"""
+        stream = self.transcribe_iter(audio_path, engine, use_cache)
+        for _ in stream:
+            pass
+        return stream.result
+    
+    def transcribe_iter(self, audio_path, engine, use_cache=True):
+        """
+        串流轉錄介面：分割轉錄時每完成一個片段就依序產出其 segments
+        讓格式化與字幕寫入可與其餘上傳同時進行；迭代結束後 .result 為完整結果
+        """
+        if engine not in ("elevenlabs", "groq"):
+            raise ValueError(f"未知的引擎: {engine}")
+        return TranscriptionStream(self._iter_transcription(audio_path, engine, use_cache))
+    
+    def stream_result(self, result):
+        """把已完成的結果包成 TranscriptionStream（打包模式拆回的各檔結果沿用一般輸出流程）"""
+        def generate():
+            yield result['segments']
+            return result
+        
+        return TranscriptionStream(generate())
+    
+    def transcribe_packed(self, audio_paths, use_cache=True):
+        """
+        打包轉錄（Groq）：短音檔以短靜音間隔串接成接近上傳上限的一次請求，減少請求數與 429
+        回傳 {路徑: 轉錄結果}；長檔案、打包失敗的檔案照一般流程逐一轉錄
+        個別檔案轉錄失敗時該檔案的值為例外物件，不影響其他檔案
+        打包不剪除靜音也不加速，快取 key 不含這兩項設定
+        """
+        packing = self.config.get('packing', {})
+        use_cache = use_cache and self.result_cache is not None
+        results = {}
+        items = []
+        for path in audio_paths:
+            if use_cache:
+                cached = self.result_cache.get(self._cache_key(path, 'groq', preprocess=False))
+                if cached is not None:
+                    cached['segments'] = SegmentTimeline.from_segments(cached['segments'])
+                    results[path] = cached
+                    continue
+            try:
+                items.append((path, self._get_duration(path)))
+            except Exception:
+                items.append((path, None))
+        
+        packs, singles = plan_packs(
+            items, self._pack_seconds(), packing.get('max_clip_seconds', 120), packing.get('gap', 1.5)
+        )
+        if results:
+            print(f"⚡ {len(results)} 個檔案命中轉錄快取")
+        print(f"📦 {sum(len(pack) for pack in packs)} 個短檔案打包為 {len(packs)} 次上傳，"
+              f"{len(singles)} 個檔案個別轉錄")
+        
+        groq_config = self.config['engines']['groq']
+        workers = max(1, groq_config.get('max_workers', 4) * len(self.api_keys['groq']))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._transcribe_pack, pack): pack
+                for pack in packs
+            }
+            for future, pack in futures.items():
                 try:
-                    with open(chunk, "rb") as file:
-                        transcription = client.audio.transcriptions.create(
-                            file=(os.path.basename(chunk), file.read()),
-                            model="whisper-large-v3",
-                            prompt="繁體中文",
-                            response_format="verbose_json",
-                            timestamp_granularities=["segment"]
-                        )
-                    break
+                    packed = future.result()
                 except Exception as e:
-                    if "429" in str(e):
-                        import time
-                        wait_time = 60 * (attempt + 1)
-                        print(f"速率限制，等待 {wait_time} 秒...")
-                        time.sleep(wait_time)
-                    else:
-                        raise
-            
-            full_text += transcription.text + " "
+                    print(f"⚠️  打包上傳失敗（{e}），{len(pack)} 個檔案改為個別轉錄")
+                    singles += [entry.path for entry in pack.entries]
+                    continue
+                for path, result in packed.items():
+                    if self._repair_config():
+                        # 打包以草稿模型轉錄，低信心段落逐檔修補（key 含修補設定）
+                        result = self.repair(path, result)
+                    if use_cache:
+                        self.result_cache.put(self._cache_key(path, 'groq', preprocess=False), result)
+                    results[path] = result
+        
+        for path in singles:
+            try:
+                results[path] = self.transcribe(path, 'groq', use_cache)
+            except Exception as e:
+                print(f"❌ {Path(path).name} 轉錄失敗：{e}")
+                results[path] = e
+        return results
+    
+    def _pack_seconds(self):
+        """單次打包的長度上限：預設為第一個（品質最高）壓縮組合放得進上傳上限的長度"""
+        minutes = self.config.get('packing', {}).get('max_pack_minutes')
+        if minutes:
+            return minutes * 60
+        planner = self.compression_planner
+        return min(planner.target_bytes / planner.predict_size(planner.profiles[0], 1), self._max_single_seconds())
+    
+    def _transcribe_pack(self, pack):
+        """串接、上傳一個打包並拆回各檔案的結果"""
+        plan = self.compression_planner.plan(pack.duration)
+        tmp_dir = tempfile.mkdtemp(prefix="stt_pack_")
+        try:
+            pack_path = os.path.join(tmp_dir, f"pack{plan.ext}")
+            build_pack(pack, pack_path, plan.codec_args(), plan.format)
             
-            # 調整時間戳
-            for segment in transcription.segments:
-                segment['start'] += time_offset
-                segment['end'] += time_offset
-                all_segments.append(segment)
+            def create(api_key):
+                with open(pack_path, "rb") as file:
+                    return self._groq_result(self._groq_request(api_key, os.path.basename(pack_path), file))
             
-            duration = self._get_duration(chunk)
-            time_offset += duration
-            os.remove(chunk)
+            result = self._call_with_key('groq', pack.duration / 60, create)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
         
         return {
-            'text': full_text.strip(),
-            'segments': all_segments
+            path: {
+                'text': "".join(segment['text'] for segment in segments).strip(),
+                'segments': SegmentTimeline.from_segments(segments),
+                'packed': {'files': len(pack), 'codec': plan.describe()}
+            }
+            for path, segments in unpack_segments(pack, result['segments']).items()
         }
     
-    def _split_audio(self, input_path):
-        """分割音檔"""
-        base, ext = os.path.splitext(input_path)
-        output_pattern = f"{base}_part%03d{ext}"
-        segment_time = self.config['engines']['groq']['chunk_duration']
+    def _iter_transcription(self, audio_path, engine, use_cache):
+        cache_key = None
+        use_cache = use_cache and self.result_cache is not None
+        if use_cache:
+            cache_key = self._cache_key(audio_path, engine)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print("⚡ 命中轉錄快取，略過 API 呼叫")
+                cached['segments'] = SegmentTimeline.from_segments(cached['segments'])
+                yield cached['segments']
+                return cached
         
-        cmd = [
-            "ffmpeg", "-y", "-i", input_path,
-            "-f", "segment", "-segment_time", str(segment_time),
-            "-c", "copy", output_pattern
-        ]
+        if self._silence_config() or self._tempo(engine) != 1.0:
+            result = yield from self._iter_prepared(audio_path, engine, cache_key)
+        else:
+            result = yield from self._iter_engine(audio_path, engine, cache_key)
         
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return sorted(glob.glob(f"{base}_part*{ext}"))
+        if use_cache:
+            self.result_cache.put(cache_key, result)
+        return result
     
-    def _get_duration(self, file_path):
-        """取得音檔長度"""
-        cmd = [
-            "ffprobe", "-v", "error", "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1", file_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return float(result.stdout.strip())
-    
-    def transcribe(self, audio_path, engine):
-        """統一的轉錄介面"""
+    def _iter_engine(self, audio_path, engine, job_key=None):
+        """依引擎轉錄（不查快取），逐段產出 segments，最後回傳完整結果"""
         if engine == "elevenlabs":
-            return self.transcribe_elevenlabs(audio_path)
-        elif engine == "groq":
-            return self.transcribe_groq(audio_path)
+            result = self.transcribe_elevenlabs(audio_path)
+            yield result['segments']
+        elif self._repair_config():
+            result = yield from self._iter_repaired(
+                audio_path, self._iter_groq(audio_path, job_key=job_key)
+            )
         else:
-            raise ValueError(f"未知的引擎: {engine}")
+            result = yield from self._iter_groq(audio_path, job_key=job_key)
+        return result
+    
+    def _silence_config(self):
+        """上傳前剪除靜音的設定；未啟用時回傳 None"""
+        trim = self.config.get('silence_removal', {})
+        return trim if trim.get('enabled') else None
+    
+    def _tempo(self, engine):
+        """上傳前的加速倍率（各引擎分別設定，1.0 = 不加速）"""
+        return float(self.config['engines'][engine].get('tempo', 1.0) or 1.0)
+    
+    def _iter_prepared(self, audio_path, engine, job_key=None):
+        """
+        剪除長靜音、加速播放後再轉錄（上傳量、計費分鐘數與 API 耗時都隨之減少）
+        每批 segments 與最終結果都依對照表換回原始時間，字幕仍與原始影片對齊
+        """
+        trim = self._silence_config()
+        tempo = self._tempo(engine)
+        duration = self._get_duration(audio_path)
+        
+        intervals = None
+        removed = 0.0
+        if trim:
+            silences = detect_silences(audio_path, trim.get('noise', '-35dB'), trim.get('min_silence', 2.0))
+            intervals = kept_intervals(silences, duration, trim.get('keep', 0.3))
+            removed = duration - sum(end - start for start, end in intervals)
+            if not intervals or removed < trim.get('min_saving', 10):
+                print("靜音不多，不剪除")
+                intervals = None
+                removed = 0.0
+        if intervals is None and tempo == 1.0:
+            return (yield from self._iter_engine(audio_path, engine, job_key))
+        
+        time_map = TimeMap(intervals or [(0.0, duration)], tempo)
+        if removed:
+            print(f"✂️  剪除靜音 {removed / 60:.1f} 分鐘（{removed / duration:.0%}）")
+        if tempo != 1.0:
+            print(f"⏩ 以 {tempo:g} 倍速上傳")
+        print(f"上傳長度：{time_map.trimmed_duration / 60:.1f} 分鐘（原始 {duration / 60:.1f} 分鐘）")
+        
+        tmp_dir = tempfile.mkdtemp(prefix="stt_prepare_")
+        try:
+            prepared_path = os.path.join(tmp_dir, f"{Path(audio_path).stem}.flac")
+            prepare_audio(audio_path, prepared_path, intervals, tempo)
+            
+            inner = self._iter_engine(prepared_path, engine, job_key)
+            while True:
+                try:
+                    segments = next(inner)
+                except StopIteration as stop:
+                    result = stop.value
+                    break
+                yield time_map.remap_segments(segments)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        result = dict(result, segments=time_map.remap_segments(result['segments']))
+        if 'words' in result:
+            result['words'] = time_map.remap_words(result['words'])
+        if removed:
+            result['silence_removal'] = {
+                'removed': round(removed, 1),
+                'uploaded': round(time_map.trimmed_duration, 1)
+            }
+        if tempo != 1.0:
+            result['tempo'] = tempo
+        return result
+
+
+class TranscriptionStream:
+    """依片段順序產出 segments 列表的轉錄串流；迭代結束後 result 為完整的轉錄結果"""
+    
+    def __init__(self, generator):
+        self._generator = generator
+        self.result = None
+    
+    def __iter__(self):
+        self.result = yield from self._generator
@@ -0,0 +1,79 @@
+"""
+Tempo Benchmark Module - 以不同加速倍率轉錄同一音檔，比較與原速轉錄的字元差異
+"""
+import time
+import unicodedata
+from difflib import SequenceMatcher
+
+
+def normalize(text):
+    """只保留文字本身（去除標點、空白與符號），中文逐字比較"""
+    return "".join(
+        ch for ch in unicodedata.normalize('NFKC', text).lower()
+        if unicodedata.category(ch)[0] not in 'PZSC'
+    )
+
+
+def char_error_rate(reference, hypothesis):
+    """
+    字元錯誤率（CER）：以參考文字為基準的替換 + 刪除 + 插入字數比例
+    以 difflib 對齊近似編輯距離，長文字也能在合理時間內算完
+    """
+    reference, hypothesis = normalize(reference), normalize(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+
+    errors = 0
+    matcher = SequenceMatcher(None, reference, hypothesis, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'replace':
+            errors += max(i2 - i1, j2 - j1)
+        elif tag == 'delete':
+            errors += i2 - i1
+        elif tag == 'insert':
+            errors += j2 - j1
+    return errors / len(reference)
+
+
+def baseline(rows):
+    """原速（1.0）的結果"""
+    return next(row for row in rows if row['tempo'] == 1.0)
+
+
+def run_benchmark(stt_engine, audio_path, engine, factors):
+    """
+    依序以各倍率轉錄（1.0 一定包含在內並作為比較基準），回傳每個倍率的結果
+    [{'tempo', 'seconds', 'minutes', 'cer', 'text'}, ...]
+    一律不讀寫轉錄快取，每個倍率都實際呼叫 API，耗時才有比較意義
+    """
+    factors = sorted(set([1.0] + [float(f) for f in factors]))
+    engine_config = stt_engine.config['engines'][engine]
+    original = engine_config.get('tempo', 1.0)
+    duration = stt_engine._get_duration(audio_path)
+
+    rows = []
+    try:
+        for tempo in factors:
+            print(f"\n⏩ 倍率 {tempo:g}")
+            engine_config['tempo'] = tempo
+            started = time.monotonic()
+            result = stt_engine.transcribe(audio_path, engine, use_cache=False)
+            rows.append({
+                'tempo': tempo,
+                'seconds': time.monotonic() - started,
+                'minutes': duration / tempo / 60,
+                'text': result['text'],
+            })
+    finally:
+        engine_config['tempo'] = original
+
+    reference = baseline(rows)['text']
+    for row in rows:
+        row['cer'] = char_error_rate(reference, row['text'])
+    return rows
+
+
+def recommend(rows, max_cer):
+    """與原速差異不超過 max_cer 的最快倍率"""
+    accepted = [row for row in rows if row['cer'] <= max_cer]
+    return max(accepted, key=lambda row: row['tempo']) if accepted else baseline(rows)
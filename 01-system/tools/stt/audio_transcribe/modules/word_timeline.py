@@ -0,0 +1,185 @@
+"""
+Word Timeline Module - 以陣列保存詞級時間軸，供重新分段與時間查詢
+"""
+import os
+
+SENTENCE_ENDS = "。！？!?…"
+CLAUSE_ENDS = "，、；：,;:"
+
+
+def fill_times(starts, ends):
+    """時間缺漏時沿用前一個詞的時間，回傳 (starts, ends) 列表"""
+    filled_starts, filled_ends = [], []
+    last = 0.0
+    for start, end in zip(starts, ends):
+        start = last if start is None else start
+        end = start if end is None else end
+        filled_starts.append(start)
+        filled_ends.append(end)
+        last = end
+    return filled_starts, filled_ends
+
+
+def split_segments(starts, ends, words, speakers, max_chars=36, max_gap=0.8):
+    """
+    依詞級時間重新分段（純 Python，未安裝 numpy 時也能使用）
+    句末標點、停頓超過 max_gap 秒或換說話者時斷開；超過 max_chars 字前在子句標點或詞邊界斷開
+    speakers 為逐詞的說話者名稱（None 表示未知）
+    """
+    count = len(words)
+    text = "".join(words)
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+
+    segments = []
+    first = 0
+    for i in range(count):
+        length = offsets[i + 1] - offsets[first]
+        last_char = text[offsets[first]:offsets[i + 1]].rstrip()[-1:]
+        if i < count - 1:
+            next_length = offsets[i + 2] - offsets[i + 1]
+            if not (starts[i + 1] - ends[i] > max_gap
+                    or speakers[i + 1] != speakers[i]
+                    or (last_char and last_char in SENTENCE_ENDS)
+                    or (last_char and last_char in CLAUSE_ENDS and length >= max_chars // 2)
+                    or length + next_length > max_chars):
+                continue
+
+        segment_text = text[offsets[first]:offsets[i + 1]].strip()
+        if segment_text:
+            segment = {'start': starts[first], 'end': ends[i], 'text': segment_text}
+            if speakers[first] is not None:
+                segment['speaker'] = speakers[first]
+            segments.append(segment)
+        first = i + 1
+
+    return segments
+
+
+class WordTimeline:
+    """
+    詞級時間軸（ElevenLabs 詞級時間戳）
+    starts / ends：每個詞的起訖秒數
+    offsets：每個詞在 text 中的起始字元位置（長度為詞數 + 1）
+    speakers：說話者索引（-1 表示未知），對應 speaker_names
+    """
+
+    def __init__(self, starts, ends, text, offsets, speakers, speaker_names):
+        self.starts = starts
+        self.ends = ends
+        self.text = text
+        self.offsets = offsets
+        self.speakers = speakers
+        self.speaker_names = speaker_names
+
+    @classmethod
+    def from_columns(cls, starts, ends, words, speakers):
+        """由逐詞欄位建立（時間缺漏時沿用前一個詞的時間）"""
+        import numpy as np
+
+        count = len(words)
+        starts, ends = fill_times(starts, ends)
+        start_arr = np.array(starts, dtype=np.float64)
+        end_arr = np.array(ends, dtype=np.float64)
+
+        names = []
+        index = {}
+        speaker_arr = np.full(count, -1, dtype=np.int32)
+        for i, speaker in enumerate(speakers):
+            if speaker is None:
+                continue
+            if speaker not in index:
+                index[speaker] = len(names)
+                names.append(speaker)
+            speaker_arr[i] = index[speaker]
+
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum([len(word) for word in words], out=offsets[1:])
+        return cls(start_arr, end_arr, "".join(words), offsets, speaker_arr, names)
+
+    @classmethod
+    def from_words(cls, words):
+        """由 ElevenLabs response.words 建立（略過聲音事件）"""
+        words = [word for word in words if getattr(word, 'type', 'word') != 'audio_event']
+        return cls.from_columns(
+            [word.start for word in words],
+            [word.end for word in words],
+            [word.text or '' for word in words],
+            [getattr(word, 'speaker_id', None) for word in words]
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict() 的欄位格式建立（轉錄結果與快取中使用）"""
+        return cls.from_columns(data['start'], data['end'], data['text'], data['speaker'])
+
+    def to_dict(self):
+        """轉為可 JSON 序列化的逐欄格式"""
+        return {
+            'start': self.starts.tolist(),
+            'end': self.ends.tolist(),
+            'text': [self.word(i) for i in range(len(self))],
+            'speaker': [self.speaker_names[s] if s >= 0 else None for s in self.speakers.tolist()],
+        }
+
+    def save(self, path):
+        """寫入 .npz 附檔"""
+        import numpy as np
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                starts=self.starts,
+                ends=self.ends,
+                offsets=self.offsets,
+                speakers=self.speakers,
+                text=np.array(self.text),
+                speaker_names=np.array(self.speaker_names, dtype=str)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """讀取 .npz 附檔"""
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['starts'],
+                data['ends'],
+                str(data['text']),
+                data['offsets'],
+                data['speakers'],
+                data['speaker_names'].tolist()
+            )
+
+    def __len__(self):
+        return len(self.starts)
+
+    def word(self, i):
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def locate(self, char_pos):
+        """text 中字元位置所在的詞索引"""
+        import numpy as np
+
+        i = int(np.searchsorted(self.offsets, char_pos, side='right')) - 1
+        return min(max(i, 0), len(self) - 1)
+
+    def span(self, char_start, char_end):
+        """text[char_start:char_end] 對應的 (開始秒數, 結束秒數)"""
+        first = self.locate(char_start)
+        last = self.locate(max(char_start, char_end - 1))
+        return float(self.starts[first]), float(self.ends[last])
+
+    def segments(self, max_chars=36, max_gap=0.8):
+        """重新分段（規則見 split_segments）"""
+        return split_segments(
+            self.starts.tolist(),
+            self.ends.tolist(),
+            [self.word(i) for i in range(len(self))],
+            [self.speaker_names[s] if s >= 0 else None for s in self.speakers.tolist()],
+            max_chars, max_gap
+        )
@@ -22,14 +22,19 @@ def print_header():
     print("=" * 60)
     print()
 
-def get_file_info(audio_path):
-    """取得檔案資訊"""
-    size_mb = os.path.getsize(audio_path) / (1024 * 1024)
-    return {
+def get_file_info(audio_path, probe_cache=None):
+    """取得檔案資訊（提供 probe_cache 時一併取得長度）"""
+    info = {
         'path': audio_path,
         'name': Path(audio_path).stem,
-        'size_mb': size_mb
+        'size_mb': os.path.getsize(audio_path) / (1024 * 1024)
     }
+    if probe_cache:
+        try:
+            info['duration'] = probe_cache.duration(audio_path)
+        except Exception:
+            pass
+    return info
 
 def select_engine(stt_engine, file_info):
     """互動式選擇引擎"""
@@ -38,6 +43,8 @@ def select_engine(stt_engine, file_info):
     print(f"📁 檔案資訊")
     print(f"   檔案：{Path(file_info['path']).name}")
     print(f"   大小：{file_info['size_mb']:.1f} MB")
+    if 'duration' in file_info:
+        print(f"   長度：{file_info['duration'] / 60:.1f} 分鐘")
     print()
     
     print("🤖 可用的 STT 引擎：")
@@ -92,16 +99,30 @@ def main():
   %(prog)s --input audio.mp3
   %(prog)s --input audio.mp3 --engine elevenlabs
   %(prog)s --input audio.mp3 --output-name "EP01"
+  %(prog)s --serve
+  %(prog)s --input sample.mp3 --engine groq --benchmark-tempo 1.25,1.5
+  %(prog)s --input voice_memos/ --pack
         """
     )
     
-    parser.add_argument('--input', required=True, help='輸入音檔路徑')
+    parser.add_argument('--input', help='輸入音檔路徑（--pack 時為資料夾）')
     parser.add_argument('--engine', choices=['elevenlabs', 'groq'], help='指定 STT 引擎（跳過選擇）')
     parser.add_argument('--output-name', help='自訂輸出資料夾名稱')
     parser.add_argument('--skip-format', action='store_true', help='跳過格式化')
+    parser.add_argument('--no-cache', action='store_true', help='忽略轉錄快取，強制重新呼叫 API')
+    parser.add_argument('--serve', action='store_true', help='以常駐服務模式啟動（接受 transcribe_client.py 送出的工作）')
+    parser.add_argument('--benchmark-tempo', metavar='FACTORS', help='以逗號分隔的加速倍率比較轉錄差異（如 1.25,1.5），不產生輸出檔')
+    parser.add_argument('--max-cer', type=float, default=0.03, help='--benchmark-tempo 可接受的字元差異率（預設 0.03）')
+    parser.add_argument('--pack', action='store_true', help='打包模式：資料夾內的短音檔串接成較少的 Groq 請求，再拆回各檔輸出')
     
     args = parser.parse_args()
     
+    if args.serve:
+        serve()
+        return
+    if not args.input:
+        parser.error("需要 --input（或使用 --serve 啟動常駐服務）")
+    
     # 檢查檔案
     if not os.path.exists(args.input):
         print(f"❌ 錯誤：找不到檔案 {args.input}")
@@ -114,16 +135,19 @@ def main():
     rules_path = Path(__file__).parent / "formatting_rules.yaml"
     dict_path = Path(__file__).parent / "custom_dict.yaml"
     
-    import yaml
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
-    
     stt_engine = STTEngine(config_path)
     formatter = Formatter(rules_path, dict_path)
-    output_mgr = OutputManager(config)
+    output_mgr = OutputManager(stt_engine.config)
+    
+    if args.pack:
+        if args.engine == 'elevenlabs':
+            print("❌ 錯誤：打包模式只支援 Groq")
+            sys.exit(1)
+        run_packed(args, stt_engine, formatter, output_mgr)
+        return
     
     # 取得檔案資訊
-    file_info = get_file_info(args.input)
+    file_info = get_file_info(args.input, stt_engine.probe_cache)
     
     # 選擇引擎
     if args.engine:
@@ -133,20 +157,122 @@ def main():
     else:
         engine = select_engine(stt_engine, file_info)
     
+    if args.benchmark_tempo:
+        benchmark_tempo(args, engine, stt_engine)
+        return
+    
+    run_job(args, engine, stt_engine, formatter, output_mgr)
+
+def benchmark_tempo(args, engine, stt_engine):
+    """以各加速倍率轉錄同一音檔，找出與原速結果差異可接受的最快倍率"""
+    from modules.tempo_benchmark import recommend, run_benchmark
+    
+    try:
+        factors = [float(f) for f in args.benchmark_tempo.split(',') if f.strip()]
+    except ValueError:
+        print(f"❌ 錯誤：無效的倍率 {args.benchmark_tempo}")
+        sys.exit(1)
+    
+    print("📊 加速倍率比較（每個倍率各轉錄一次，不使用轉錄快取，會使用額度；建議使用 10 分鐘左右的代表性片段）")
+    print("-" * 60)
+    rows = run_benchmark(stt_engine, args.input, engine, factors)
+    
+    print()
+    print(f"{'倍率':>6} {'上傳分鐘':>8} {'耗時(秒)':>8} {'字元差異':>8}")
+    for row in rows:
+        print(f"{row['tempo']:>6g} {row['minutes']:>8.1f} {row['seconds']:>8.1f} {row['cer']:>8.1%}")
+    
+    best = recommend(rows, args.max_cer)
+    print()
+    print(f"✅ 建議倍率：{best['tempo']:g}（與原速差異 {best['cer']:.1%}，上限 {args.max_cer:.0%}）")
+    print(f"   設定方式：config.yaml → engines.{engine}.tempo: {best['tempo']:g}")
+
+def run_packed(args, stt_engine, formatter, output_mgr):
+    """打包模式：一次轉錄資料夾內所有音檔，再逐檔格式化與輸出"""
+    from modules.probe_cache import find_media
+    
+    if not os.path.isdir(args.input):
+        print("❌ 錯誤：打包模式的 --input 需為資料夾")
+        sys.exit(1)
+    paths = find_media(args.input, recursive=False)
+    if not paths:
+        print(f"⚠️  {args.input} 中沒有媒體檔")
+        return
+    
+    print("📝 打包轉錄")
+    print("-" * 60)
+    results = stt_engine.transcribe_packed(paths, use_cache=not args.no_cache)
+    print()
+    
+    failed = [path for path in paths if isinstance(results[path], Exception)]
+    for path in paths:
+        if path in failed:
+            continue
+        job_args = argparse.Namespace(
+            input=str(path), output_name=None, skip_format=args.skip_format, no_cache=args.no_cache
+        )
+        run_job(job_args, 'groq', stt_engine, formatter, output_mgr, transcription=results[path])
+    
+    if failed:
+        print(f"❌ {len(failed)} 個檔案轉錄失敗：")
+        for path in failed:
+            print(f"   - {Path(path).name}：{results[path]}")
+        sys.exit(1)
+
+def run_job(args, engine, stt_engine, formatter, output_mgr, transcription=None):
+    """
+    執行一次轉錄工作（轉錄 → 格式化 → 輸出），回傳 (輸出資料夾, 檔案清單)
+    args 需有 input / output_name / skip_format / no_cache；常駐服務也使用此函式
+    transcription 為已完成的轉錄結果時（打包模式）略過 API 呼叫，只執行格式化與輸出
+    """
+    file_info = get_file_info(args.input)
+    
+    # 先建立輸出資料夾，轉錄過程中字幕即逐段寫入
+    output_folder = output_mgr.create_output_folder(
+        file_info['name'],
+        args.output_name
+    )
+    
     # 階段 1：轉錄
     print("📝 階段 1：語音轉錄")
     print("-" * 60)
+    print(f"📂 字幕即時寫入：{output_folder}")
+    
+    writers = [output_mgr.open_srt_stream(output_folder, file_info['name'])]
+    formatted_writer = None
+    if not args.skip_format:
+        formatted_writer = output_mgr.open_srt_stream(output_folder, file_info['name'], formatter)
+        writers.append(formatted_writer)
     
     try:
-        transcription = stt_engine.transcribe(args.input, engine)
+        if transcription is None:
+            stream = stt_engine.transcribe_iter(args.input, engine, use_cache=not args.no_cache)
+        else:
+            stream = stt_engine.stream_result(transcription)
+        for segments in stream:
+            for writer in list(writers):
+                try:
+                    writer.write(segments)
+                except Exception as e:
+                    if writer is not formatted_writer:
+                        raise
+                    print(f"⚠️  格式化失敗：{e}")
+                    print("將繼續產生未格式化版本")
+                    writer.close()
+                    writers.remove(writer)
+                    formatted_writer = None
+        transcription = stream.result
         print("✅ 轉錄完成")
         print()
     except Exception as e:
         print(f"❌ 轉錄失敗：{e}")
         sys.exit(1)
+    finally:
+        for writer in writers:
+            writer.close()
     
     # 階段 2：格式化
-    formatted_srt = None
+    formatted_srt = formatted_writer is not None
     formatted_text = None
     
     if not args.skip_format:
@@ -154,10 +280,7 @@ def main():
         print("-" * 60)
         
         try:
-            # 格式化 SRT
-            formatted_srt = formatter.format_srt(transcription['segments'])
-            
-            # 格式化純文字
+            # 格式化 SRT 已在轉錄時逐段寫入，這裡格式化純文字
             formatted_text = formatter.format_text(transcription['text'])
             
             print("✅ 格式化完成")
@@ -172,12 +295,6 @@ def main():
     print("-" * 60)
     
     try:
-        # 創建輸出資料夾
-        output_folder = output_mgr.create_output_folder(
-            file_info['name'],
-            args.output_name
-        )
-        
         # 處理原始音檔
         audio_dest = output_mgr.handle_audio(args.input, output_folder)
         
@@ -189,21 +306,17 @@ def main():
             formatted_text
         )
         
-        # 儲存格式化 SRT
+        # 格式化 SRT（轉錄時已逐段寫入）
         if formatted_srt:
-            formatted_srt_path = output_mgr.save_formatted_srt(
-                output_folder,
-                file_info['name'],
-                formatted_srt
-            )
-            files['srt_formatted'] = formatted_srt_path
+            files['srt_formatted'] = formatted_writer.path
         
         # 生成 metadata
         metadata_info = {
             'engine': engine,
-            'model': config['engines'][engine]['model'],
+            'model': stt_engine.config['engines'][engine]['model'],
             'original_file': args.input,
             'file_size': f"{file_info['size_mb']:.1f} MB",
+            'compression': transcription.get('compression'),
             'formatting_applied': not args.skip_format,
             'custom_dict_used': True,
             'output_files': {k: str(v.name) for k, v in files.items()}
@@ -220,6 +333,8 @@ def main():
             print(f"   ✅ {file_info['name']}_formatted.srt（格式化字幕）⭐")
         if formatted_text:
             print(f"   ✅ {file_info['name']}_formatted.txt（格式化文字）⭐")
+        if 'words' in files:
+            print(f"   ✅ {file_info['name']}.words.npz（詞級時間軸）")
         print(f"   ✅ _metadata.yaml（轉錄資訊）")
         print()
         
@@ -227,11 +342,46 @@ def main():
         print("🎉 轉錄完成！")
         print("=" * 60)
         
+        return output_folder, files
+        
     except Exception as e:
         print(f"❌ 儲存失敗：{e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
 
+def serve():
+    """常駐服務：STTEngine、Formatter 與各 Key 的 API client 只初始化一次，之後持續接受工作"""
+    from modules.daemon import TranscriptionDaemon
+    
+    config_path = Path(__file__).parent / "config.yaml"
+    stt_engine = STTEngine(config_path)
+    formatter = Formatter(Path(__file__).parent / "formatting_rules.yaml", Path(__file__).parent / "custom_dict.yaml")
+    output_mgr = OutputManager(stt_engine.config)
+    
+    def handle(params):
+        if not os.path.exists(params['input']):
+            raise FileNotFoundError(f"找不到檔案 {params['input']}")
+        engine = params.get('engine') or stt_engine.config.get('default_engine') or 'groq'
+        if engine not in ('elevenlabs', 'groq'):
+            raise ValueError(f"未知的引擎: {engine}")
+        print(f"🤖 使用引擎：{engine}")
+        args = argparse.Namespace(
+            input=params['input'],
+            output_name=params.get('output_name'),
+            skip_format=bool(params.get('skip_format')),
+            no_cache=bool(params.get('no_cache'))
+        )
+        output_folder, files = run_job(args, engine, stt_engine, formatter, output_mgr)
+        # 回傳絕對路徑：用戶端的工作目錄不一定與服務相同
+        return {
+            'output_folder': str(Path(output_folder).resolve()),
+            'files': {k: str(Path(v).resolve()) for k, v in files.items()}
+        }
+    
+    daemon_config = stt_engine.config.get('daemon', {})
+    token_path = stt_engine._resolve_path(daemon_config.get('token_file', '.cache/daemon.token'))
+    TranscriptionDaemon(daemon_config, handle, token_path).serve_forever()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Audio Transcription Client - 將轉錄工作送到常駐服務（transcribe.py --serve）
+只使用標準函式庫，不需載入 yaml / groq / elevenlabs，適合批次或代理流程大量送出短工作
+"""
+import os
+import sys
+import json
+import argparse
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+DEFAULT_URL = os.environ.get("STT_DAEMON_URL", "http://127.0.0.1:8765")
+# 服務啟動時寫入的存取權杖（config.yaml 的 daemon.token_file，相對於本工具目錄）
+DEFAULT_TOKEN_FILE = os.environ.get(
+    "STT_DAEMON_TOKEN_FILE", str(Path(__file__).resolve().parent / ".cache/daemon.token")
+)
+
+def load_token(path=DEFAULT_TOKEN_FILE):
+    """讀取存取權杖（STT_DAEMON_TOKEN 環境變數優先）"""
+    token = os.environ.get("STT_DAEMON_TOKEN")
+    if token:
+        return token
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+def _headers(token=None, **extra):
+    return dict(extra, Authorization=f"Bearer {token or load_token()}")
+
+def is_running(url=DEFAULT_URL, timeout=1):
+    """常駐服務是否可連線"""
+    try:
+        with urllib.request.urlopen(f"{url}/health", timeout=timeout) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+def submit(params, url=DEFAULT_URL, token=None):
+    """送出工作，回傳工作資訊（含 id）"""
+    params = dict(params, input=os.path.abspath(params['input']))
+    request = urllib.request.Request(
+        f"{url}/jobs",
+        data=json.dumps(params, ensure_ascii=False).encode('utf-8'),
+        headers=_headers(token, **{'Content-Type': 'application/json'}),
+        method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+def events(job_id, url=DEFAULT_URL, token=None):
+    """逐一產出工作的進度事件（log），最後一個事件為結果（result）"""
+    request = urllib.request.Request(f"{url}/jobs/{job_id}/events", headers=_headers(token))
+    with urllib.request.urlopen(request) as response:
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+def run(params, url=DEFAULT_URL, on_line=print, token=None):
+    """送出工作並串流輸出進度，回傳最終結果事件"""
+    token = token or load_token()
+    job = submit(params, url, token)
+    for event in events(job['id'], url, token):
+        if event['type'] == 'log':
+            on_line(event['line'])
+        else:
+            return event
+
+def main():
+    parser = argparse.ArgumentParser(description="送出轉錄工作到常駐服務")
+    parser.add_argument('--input', required=True, help='輸入音檔路徑')
+    parser.add_argument('--engine', choices=['elevenlabs', 'groq'], help='指定 STT 引擎（預設依服務設定）')
+    parser.add_argument('--output-name', help='自訂輸出資料夾名稱')
+    parser.add_argument('--skip-format', action='store_true', help='跳過格式化')
+    parser.add_argument('--no-cache', action='store_true', help='忽略轉錄快取，強制重新呼叫 API')
+    parser.add_argument('--url', default=DEFAULT_URL, help=f'常駐服務位址（預設 {DEFAULT_URL}）')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ 錯誤：找不到檔案 {args.input}")
+        sys.exit(1)
+    if not is_running(args.url):
+        print(f"❌ 無法連線到轉錄服務 {args.url}")
+        print("請先執行：python transcribe.py --serve")
+        sys.exit(1)
+    try:
+        token = load_token()
+    except OSError:
+        print(f"❌ 找不到存取權杖 {DEFAULT_TOKEN_FILE}（可用 STT_DAEMON_TOKEN_FILE 指定位置）")
+        sys.exit(1)
+
+    result = run({
+        'input': args.input,
+        'engine': args.engine,
+        'output_name': args.output_name,
+        'skip_format': args.skip_format,
+        'no_cache': args.no_cache,
+    }, args.url, token=token)
+
+    if not result or result['status'] != 'done':
+        print(f"❌ 工作失敗：{(result or {}).get('error')}")
+        sys.exit(1)
+    print(json.dumps(result['result'], ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,14 @@ import json
 from pathlib import Path
 from datetime import datetime
 
+# 以腳本所在位置定位轉錄工具（不依賴目前工作目錄）
+STT_TOOL_DIR = Path(__file__).resolve().parents[1] / "01-system/tools/stt/audio_transcribe"
+
+def _add_stt_tool_path():
+    """需要轉錄工具的模組時才加入 sys.path"""
+    if str(STT_TOOL_DIR) not in sys.path:
+        sys.path.insert(0, str(STT_TOOL_DIR))
+
 class CourseVideoProcessor:
     def __init__(self, input_dir, output_dir, stt_engine="groq", slice_mode="proxy"):
         self.input_dir = Path(input_dir)
@@ -31,12 +39,51 @@ class CourseVideoProcessor:
         # 工具路徑
         self.project_root = Path.cwd()
         self.stt_tool = self.project_root / "01-system/tools/stt/audio_transcribe/transcribe.py"
+        self._stt_client = None
+        self._stt_client_checked = False
         self.slicer_tool = self.project_root / "01-system/tools/media/video_slicer/clip_extractor.py"
         
         # 進度追蹤
         self.progress_file = self.output_dir / "processing_progress.json"
         self.load_progress()
     
+    @property
+    def stt_client(self):
+        """第一次轉錄時才檢查常駐服務，之後沿用同一個結果"""
+        if not self._stt_client_checked:
+            self._stt_client = self._load_stt_client()
+            self._stt_client_checked = True
+        return self._stt_client
+    
+    def _load_stt_client(self):
+        """轉錄常駐服務（transcribe.py --serve）已啟動時回傳用戶端模組，否則回傳 None"""
+        _add_stt_tool_path()
+        try:
+            import transcribe_client
+        except ImportError as e:
+            print(f"⚠️  無法載入轉錄服務用戶端（{e}），改用命令列轉錄")
+            return None
+        
+        if transcribe_client.is_running():
+            print(f"🛰️  使用轉錄常駐服務：{transcribe_client.DEFAULT_URL}")
+            return transcribe_client
+        return None
+    
+    def transcribe_via_daemon(self, audio_path):
+        """送到常駐服務轉錄（省去每支影片重新啟動與初始化的成本）"""
+        result = self.stt_client.run(
+            {'input': str(audio_path), 'engine': self.stt_engine},
+            on_line=lambda line: print(f"      {line}")
+        )
+        if not result or result['status'] != 'done':
+            print(f"   ❌ 轉錄失敗: {(result or {}).get('error')}")
+            return None
+        
+        files = result['result']['files']
+        srt_path = files.get('srt_formatted') or files.get('srt_original')
+        print(f"   ✅ 轉錄完成: {srt_path}")
+        return Path(srt_path)
+    
     def load_progress(self):
         """載入處理進度"""
         if self.progress_file.exists():
@@ -56,12 +103,20 @@ class CourseVideoProcessor:
             json.dump(self.progress, f, ensure_ascii=False, indent=2)
     
     def get_video_files(self):
-        """取得所有影片檔案"""
+        """取得所有影片檔案（並行預檢，媒體資訊寫入共用快取供後續步驟使用）"""
+        _add_stt_tool_path()
+        from modules.probe_cache import ProbeCache
+        
         videos = sorted(self.input_dir.glob("*.MP4"))
         print(f"📹 找到 {len(videos)} 個影片檔案")
+        infos = ProbeCache().preflight(videos)
         for i, video in enumerate(videos, 1):
-            size_gb = video.stat().st_size / (1024**3)
-            print(f"   {i}. {video.name} ({size_gb:.1f}GB)")
+            info = infos[video]
+            if isinstance(info, Exception):
+                print(f"   {i}. {video.name} ⚠️  無法讀取媒體資訊: {info}")
+                continue
+            size_gb = info['size'] / (1024**3)
+            print(f"   {i}. {video.name} ({size_gb:.1f}GB, {info['duration'] / 60:.0f} 分鐘)")
         return videos
     
     def extract_audio(self, video_path):
@@ -96,6 +151,13 @@ class CourseVideoProcessor:
         """使用 STT 轉錄音訊"""
         print(f"   🎙️  開始轉錄: {audio_path.name}")
         
+        if self.stt_client:
+            try:
+                return self.transcribe_via_daemon(audio_path)
+            except Exception as e:
+                print(f"   ❌ 轉錄失敗: {e}")
+                return None
+        
         # 執行轉錄工具
         cmd = [
             "python3", str(self.stt_tool),
@@ -4,10 +4,26 @@ import subprocess
 import argparse
 import glob
 import json
+import tempfile
+from pathlib import Path
 from groq import Groq
 
+# Shared rate limiter from the audio_transcribe tool
+sys.path.append(str(Path(__file__).parents[1] / "01-system/tools/stt/audio_transcribe"))
+from modules.rate_limiter import RateLimiter, is_rate_limited
+from modules.request_packer import build_pack, plan_packs, unpack_segments
+
 # Configuration
 API_KEY_FILE = "01-system/configs/apis/API-Keys.md"
+REQUESTS_PER_MINUTE = 20
+
+# Request packing (project mode): short files are concatenated into one upload
+PACK_MAX_CLIP_SECONDS = 120
+PACK_GAP_SECONDS = 1.5
+PACK_MAX_SECONDS = 24 * 1024 * 1024 * 8 / 64000 * 0.95  # 64k mp3 under the 24 MB upload limit
+PACK_CODEC_ARGS = ["-c:a", "libmp3lame", "-ac", "1", "-ar", "16000", "-b:a", "64k"]
+
+rate_limiter = RateLimiter({"groq": {"requests_per_minute": REQUESTS_PER_MINUTE}})
 
 def get_api_key():
     """Retrieves API key from environment or config file."""
@@ -98,6 +114,58 @@ def split_audio(input_path, segment_time=600):
         print(f"Error splitting audio: {e}")
         sys.exit(1)
 
+class TranscriptionResult:
+    """Minimal stand-in for the SDK response when results are assembled locally."""
+    def __init__(self, text, segments):
+        self.text = text
+        self.segments = segments
+
+def request_transcription(client, audio_path):
+    """Sends one transcription request, pacing requests and retrying on 429."""
+    max_retries = 10
+    for attempt in range(max_retries):
+        rate_limiter.wait("groq", client.api_key)
+        try:
+            with open(audio_path, "rb") as file:
+                return client.audio.transcriptions.create(
+                    file=(os.path.basename(audio_path), file),
+                    model="whisper-large-v3",
+                    prompt="繁體中文",
+                    response_format="verbose_json",
+                    timestamp_granularities=["segment"]
+                )
+        except Exception as e:
+            if not is_rate_limited(e) or attempt == max_retries - 1:
+                raise
+            wait_time = rate_limiter.on_rate_limited("groq", client.api_key, e, attempt)
+            print(f"Rate limit hit (429). Waiting {wait_time:.0f}s before retry {attempt+1}/{max_retries}...")
+
+def transcribe_packed(client, audio_files):
+    """
+    Concatenates short files (with silence gaps) into uploads near the size limit and
+    splits the returned segments back per file using the pack's offset table.
+    Returns {path: TranscriptionResult}; files that were not packed are left out.
+    """
+    items = [(path, get_duration(path)) for path in audio_files]
+    packs, _ = plan_packs(items, PACK_MAX_SECONDS, PACK_MAX_CLIP_SECONDS, PACK_GAP_SECONDS)
+    
+    results = {}
+    for pack in packs:
+        print(f"Transcribing pack of {len(pack)} files ({pack.duration / 60:.1f} min)...")
+        with tempfile.TemporaryDirectory(prefix="groq_pack_") as tmp_dir:
+            pack_path = os.path.join(tmp_dir, "pack.mp3")
+            try:
+                build_pack(pack, pack_path, PACK_CODEC_ARGS, "mp3")
+                transcription = request_transcription(client, pack_path)
+            except Exception as e:
+                print(f"Error transcribing pack, falling back to one request per file: {e}")
+                continue
+        
+        for path, segments in unpack_segments(pack, transcription.segments).items():
+            text = "".join(segment['text'] for segment in segments).strip()
+            results[path] = TranscriptionResult(text, segments)
+    return results
+
 def transcribe_file(client, audio_path):
     """Transcribes a single audio file, handling large files by splitting."""
     compressed_path = compress_audio(audio_path)
@@ -111,7 +179,7 @@ def transcribe_file(client, audio_path):
         try:
             with open(compressed_path, "rb") as file:
                 transcription = client.audio.transcriptions.create(
-                    file=(os.path.basename(compressed_path), file.read()),
+                    file=(os.path.basename(compressed_path), file),
                     model="whisper-large-v3",
                     prompt="繁體中文",
                     response_format="verbose_json",
@@ -139,10 +207,12 @@ def transcribe_file(client, audio_path):
             
             max_retries = 10
             for attempt in range(max_retries):
+                # Pace requests and honour any pause requested by the server
+                rate_limiter.wait("groq", client.api_key)
                 try:
                     with open(chunk, "rb") as file:
                         transcription = client.audio.transcriptions.create(
-                            file=(os.path.basename(chunk), file.read()),
+                            file=(os.path.basename(chunk), file),
                             model="whisper-large-v3",
                             prompt="繁體中文",
                             response_format="verbose_json",
@@ -150,11 +220,9 @@ def transcribe_file(client, audio_path):
                         )
                     break # Success, exit retry loop
                 except Exception as e:
-                    if "429" in str(e):
-                        wait_time = 60 * (attempt + 1)
-                        print(f"Rate limit hit (429). Waiting {wait_time}s before retry {attempt+1}/{max_retries}...")
-                        import time
-                        time.sleep(wait_time)
+                    if is_rate_limited(e):
+                        wait_time = rate_limiter.on_rate_limited("groq", client.api_key, e, attempt)
+                        print(f"Rate limit hit (429). Waiting {wait_time:.0f}s before retry {attempt+1}/{max_retries}...")
                     else:
                         print(f"Error transcribing chunk {chunk}: {e}")
                         # Cleanup remaining chunks
@@ -185,12 +253,6 @@ def transcribe_file(client, audio_path):
         
         os.remove(compressed_path)
         
-        # Create a mock object to match the expected return structure
-        class TranscriptionResult:
-            def __init__(self, text, segments):
-                self.text = text
-                self.segments = segments
-        
         return TranscriptionResult(full_text.strip(), all_segments)
 
 def save_file(content, path):
@@ -199,9 +261,10 @@ def save_file(content, path):
         f.write(content)
     print(f"Saved {path}")
 
-def process_single_file(client, input_path):
-    """Pipeline for a single file."""
-    transcription = transcribe_file(client, input_path)
+def process_single_file(client, input_path, transcription=None):
+    """Pipeline for a single file (transcription is given when it came from a pack)."""
+    if transcription is None:
+        transcription = transcribe_file(client, input_path)
     
     base, _ = os.path.splitext(input_path)
     
@@ -216,8 +279,8 @@ def process_single_file(client, input_path):
     
     return transcription.text
 
-def process_project_folder(client, folder_path):
-    """Pipeline for a project folder."""
+def process_project_folder(client, folder_path, pack=False):
+    """Pipeline for a project folder (pack=True batches short files into fewer requests)."""
     # Find all audio files
     extensions = ['*.mp3', '*.wav', '*.m4a', '*.mp4', '*.mov', '*.ogg', '*.flac']
     audio_files = []
@@ -231,11 +294,13 @@ def process_project_folder(client, folder_path):
         print("No audio files found in folder.")
         return
 
+    packed = transcribe_packed(client, audio_files) if pack else {}
+    
     combined_text = "# Project Transcription\n\n"
     
     for audio_file in audio_files:
         print(f"Processing {audio_file}...")
-        text = process_single_file(client, audio_file)
+        text = process_single_file(client, audio_file, packed.get(audio_file))
         
         filename = os.path.basename(audio_file)
         combined_text += f"## {filename}\n\n{text}\n\n"
@@ -248,6 +313,7 @@ def main():
     parser = argparse.ArgumentParser(description="Groq STT Tool")
     parser.add_argument("--input", required=True, help="Input file or folder path")
     parser.add_argument("--mode", choices=["single", "project"], required=True, help="Mode: single file or project folder")
+    parser.add_argument("--pack", action="store_true", help="Project mode: concatenate short files into fewer uploads")
     
     args = parser.parse_args()
     
@@ -261,7 +327,7 @@ def main():
             print("Error: Input must be a file for single mode.")
     elif args.mode == "project":
         if os.path.isdir(args.input):
-            process_project_folder(client, args.input)
+            process_project_folder(client, args.input, pack=args.pack)
         else:
             print("Error: Input must be a directory for project mode.")
 
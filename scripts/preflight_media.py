@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+媒體預檢
+功能: 並行對整個資料夾執行 ffprobe，結果寫入共用的媒體資訊快取，批次處理時不再逐一探測
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+STT_TOOL_PATH = Path(__file__).parents[1] / "01-system/tools/stt/audio_transcribe"
+sys.path.insert(0, str(STT_TOOL_PATH))
+
+from modules.probe_cache import ProbeCache, find_media
+
+
+def main():
+    parser = argparse.ArgumentParser(description="並行預檢媒體檔並填入媒體資訊快取")
+    parser.add_argument("folder", help="媒體資料夾路徑")
+    parser.add_argument("--workers", type=int, default=8, help="同時執行的 ffprobe 數（預設 8）")
+    parser.add_argument("--keyframes", action="store_true", help="一併計算影片關鍵影格數（需讀取整個檔案，較慢）")
+    parser.add_argument("--no-recursive", action="store_true", help="不搜尋子資料夾")
+    args = parser.parse_args()
+
+    paths = find_media(args.folder, recursive=not args.no_recursive)
+    if not paths:
+        print(f"⚠️  {args.folder} 中沒有媒體檔")
+        return
+
+    print(f"🔍 預檢 {len(paths)} 個檔案（{args.workers} 個並行）...")
+    results = ProbeCache().preflight(paths, workers=args.workers, keyframes=args.keyframes)
+
+    failed = 0
+    total_duration = 0
+    for path, info in results.items():
+        if isinstance(info, Exception):
+            failed += 1
+            print(f"   ❌ {path.name}: {info}")
+            continue
+        total_duration += info['duration']
+        codecs = " / ".join(c for c in (info['video_codec'], info['audio_codec']) if c)
+        rate = f" {info['sample_rate']}Hz" if info['sample_rate'] else ""
+        keyframes = f"，{info['keyframes']} 關鍵影格" if info['keyframes'] is not None else ""
+        print(f"   ✅ {path.name}: {info['duration'] / 60:.1f} 分鐘，{codecs}{rate}{keyframes}")
+
+    print(f"\n📊 共 {len(paths) - failed} 個檔案，總長 {total_duration / 3600:.1f} 小時")
+    if failed:
+        print(f"❌ {failed} 個檔案無法讀取")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()